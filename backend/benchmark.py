@@ -0,0 +1,239 @@
+# benchmark.py
+"""
+Load and latency benchmark for the goal portal API.
+
+By default the Flask app is started in-process with the stub LLM backend
+(LLM_BACKEND=stub) and a fresh LOCAL_STATE_DIR, and driven by a pool of
+client threads. Pass --url to benchmark a running server instead, e.g. one
+started by `invoke bench` under gunicorn with the stub backend.
+
+Reports throughput, p50/p95/p99 latency and error rate per endpoint, and
+exits with status 1 when --max-p95-ms or --max-error-rate is exceeded.
+
+    python benchmark.py --concurrency 8 --requests 200
+    python benchmark.py --url http://127.0.0.1:5055 --duration 30 --json results.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+GOAL = {
+    "title": "Automate goal drafting",
+    "description": "Build a script that drafts goals from job title and department by Q4 2026.",
+    "kpi": "50% less time spent drafting goals",
+    "companyTopBetAlignment": "TRANSFORMING INTO AN AI COMPANY",
+    "framework3E": "ELEVATE",
+    "coreValue": "Simplify to Amplify"
+}
+
+DEPARTMENTS = ["Development - HKPL", "Human Resources", "Digital Marketing", "IT"]
+
+
+def generate_body(rng, cache_hit_ratio):
+    """A goal generation request; repeated bodies exercise the result cache."""
+    if rng.random() < cache_hit_ratio:
+        seed = 0
+    else:
+        seed = rng.randrange(1 << 30)
+    return {
+        "jobTitle": "Software Engineer",
+        "department": DEPARTMENTS[seed % len(DEPARTMENTS)],
+        "goalDescription": f"Automate the goal making process #{seed}",
+        "keyResult": "Reduce meetings with supervisors by 30%",
+        "dueDate": "2026-12-31",
+        "managersGoal": "Company-wide AI adoption"
+    }
+
+
+SCENARIOS = {
+    "generate": ("POST", "/api/generate-smart-goals", generate_body),
+    "stream": ("POST", "/api/generate-smart-goals/stream", generate_body),
+    "edit": ("POST", "/api/edit-user-goal", lambda rng, ratio: {"goal": GOAL, "comment": f"Make it more specific #{rng.randrange(1 << 30)}"}),
+    "prompts": ("GET", "/api/prompts", None),
+    "health": ("GET", "/api/health", None),
+}
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name, latency, status):
+        with self._lock:
+            self.latencies[name].append(latency)
+            self.statuses[name][status] += 1
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None, on_first_byte=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                first = response.read(1)
+                if on_first_byte and first:
+                    on_first_byte()
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+class FlaskClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, on_first_byte=None):
+        response = self.client.open(path, method=method, json=body, buffered=False)
+        try:
+            for chunk in response.response:
+                if chunk and on_first_byte:
+                    on_first_byte()
+                    on_first_byte = None
+        finally:
+            response.close()
+        return response.status_code
+
+
+def run_client(make_client, scenarios, results, stop, counter, args, seed):
+    client = make_client()
+    rng = random.Random(seed)
+    while not stop.is_set():
+        with counter["lock"]:
+            if args.requests and counter["sent"] >= args.requests:
+                return
+            counter["sent"] += 1
+        name = rng.choice(scenarios)
+        method, path, make_body = SCENARIOS[name]
+        body = make_body(rng, args.cache_hit_ratio) if make_body else None
+        started = time.perf_counter()
+        first_byte = []
+        try:
+            status = client.request(method, path, body, on_first_byte=lambda: first_byte.append(time.perf_counter()))
+        except Exception as e:
+            print(f"Warning: {name} request failed: {e}", file=sys.stderr)
+            status = "exception"
+        results.add(name, time.perf_counter() - started, status)
+        if name == "stream" and first_byte:
+            results.add("stream:first_event", first_byte[0] - started, status)
+
+
+def in_process_app(args):
+    """Create the Flask app with the stub LLM and private local state."""
+    os.environ.setdefault("LLM_BACKEND", "stub")
+    os.environ.setdefault("LOCAL_STATE_DIR", tempfile.mkdtemp(prefix="goal-portal-bench-"))
+    # The benchmark is a single client; per-client rate limits would only measure the limiter
+    os.environ.setdefault("RATE_LIMIT_RATE", "100000")
+    os.environ.setdefault("RATE_LIMIT_BURST", "100000")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from src.lib import create_app
+    return create_app()
+
+
+def report(results, elapsed):
+    rows = []
+    for name in sorted(results.latencies):
+        latencies = results.latencies[name]
+        statuses = dict(results.statuses[name])
+        errors = sum(count for status, count in statuses.items() if status == "exception" or int(status) >= 400)
+        rows.append({
+            "endpoint": name,
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "error_rate": round(errors / len(latencies), 4),
+            "statuses": {str(status): count for status, count in statuses.items()}
+        })
+
+    header = f"{'endpoint':<20}{'requests':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}  statuses"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['endpoint']:<20}{row['requests']:>9}{row['throughput_rps']:>9}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>8.1%}  {row['statuses']}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the goal portal API")
+    parser.add_argument("--url", help="Base URL of a running server; the app runs in-process if omitted")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests (0 to run for --duration)")
+    parser.add_argument("--duration", type=float, default=60, help="Maximum run time in seconds")
+    parser.add_argument("--endpoints", default="generate,stream,edit,prompts", help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.0, help="Share of generate requests that repeat one body")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any endpoint's p95 is above this")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if any endpoint's error rate is above this")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        app = in_process_app(args)
+        make_client = lambda: FlaskClient(app)
+
+    results = Results()
+    stop = threading.Event()
+    counter = {"lock": threading.Lock(), "sent": 0}
+    threads = [
+        threading.Thread(target=run_client, args=(make_client, scenarios, results, stop, counter, args, args.seed + i), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    deadline = started + args.duration
+    for thread in threads:
+        thread.join(max(0, deadline - time.perf_counter()))
+    stop.set()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{counter['sent']} requests, {args.concurrency} clients, {elapsed:.1f}s\n")
+    rows = report(results, elapsed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"concurrency": args.concurrency, "elapsed_seconds": round(elapsed, 2), "endpoints": rows}, f, indent=2)
+
+    failed = [
+        row["endpoint"] for row in rows
+        if (args.max_p95_ms is not None and row["p95_ms"] > args.max_p95_ms)
+        or (args.max_error_rate is not None and row["error_rate"] > args.max_error_rate)
+    ]
+    if failed:
+        print(f"\nThresholds exceeded for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# gunicorn.conf.py
+# Read automatically by `gunicorn src.wsgi:app` when started from backend/.
+import os
+
+# Import the app once in the master so workers fork with the parsed prompts and
+# Python modules already in (copy-on-write) memory. Nothing that holds a socket,
+# thread or process pool is created at import time, so this is fork-safe.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def post_fork(server, worker):
+    # Per-worker resources (DB pool, LLM client) are opened after the fork
+    from src.lib import warm_up
+    warm_up()
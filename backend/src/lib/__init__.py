@@ -1,19 +1,44 @@
 from flask import Flask
 from .config import Config
 from .utils.auth import configure_auth
+from .utils.metrics import configure_metrics
 from .api import api_blueprint
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 import os
-from src.lib.db.db_connection import init_db_connection
+import threading
 
 
 load_dotenv()
 
+def warm_up():
+    """
+    Open the DB pool and build the LLM client in a background thread. Called in
+    each gunicorn worker after fork, so the first requests don't pay for it and
+    nothing is shared with the master process.
+    """
+    def run():
+        from src.lib.db.db_connection import init_db_pool
+        from src.lib.db.goal_writer import create_goals_table
+        from src.lib.api.routes import get_generator
+        init_db_pool()
+        try:
+            create_goals_table()
+        except Exception as e:
+            print(f"Warning: could not create the goals table at startup: {e}")
+        get_generator()
+    threading.Thread(target=run, name="warm-up", daemon=True).start()
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Behind a load balancer, take the client address from X-Forwarded-For so
+    # per-IP rate limits apply to clients rather than to the proxy
+    if Config.TRUSTED_PROXIES:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXIES, x_proto=Config.TRUSTED_PROXIES)
+
     # CORS configuration
     # Get allowed origins from environment variable or use defaults
     cors_origins_env = os.getenv('CORS_ORIGINS', '')
@@ -34,8 +59,7 @@ def create_app():
         "allow_headers": ["Content-Type", "Authorization"]
     }}, supports_credentials=True)
 
-    init_db_connection()  # ✅ Initialize DB once
-
+    configure_metrics(app)
     configure_auth(app)
     app.register_blueprint(api_blueprint)
     return app
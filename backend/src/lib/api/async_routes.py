@@ -0,0 +1,120 @@
+# lib/api/async_routes.py
+
+import asyncio
+from flask import request, jsonify, Response
+from . import api_blueprint, routes
+from .routes import (get_generator, _generation_inputs, _generator_missing, _goals_response,
+                     _edit_request, _edit_response, _sse_event, _sse_done)
+from src.lib.utils.rate_limit import rate_limited
+
+# Async views served by the ASGI app (src/asgi.py) in place of the sync view of
+# the same endpoint. Under WSGI the sync views in routes.py are used unchanged.
+async_views = {}
+
+
+def async_view_for(view):
+    """Register the decorated coroutine as the ASGI replacement for `view`."""
+    def register(f):
+        async_views[f"{api_blueprint.name}.{view.__name__}"] = f
+        return f
+    return register
+
+
+async def _get_generator():
+    # The first call builds the LLM client, which must not block the event loop
+    if routes._smart_goals_generator is not None:
+        return routes._smart_goals_generator
+    return await asyncio.to_thread(get_generator)
+
+
+@async_view_for(routes.api_generate_smart_goals)
+@rate_limited
+async def api_generate_smart_goals():
+    """Async /api/generate-smart-goals: the Gemini call is awaited instead of holding a thread"""
+    try:
+        smart_goals_generator = await _get_generator()
+        if not smart_goals_generator:
+            return _generator_missing()
+
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        inputs, error = _generation_inputs(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        print(f"Generating goals for {inputs['job_title']} in {inputs['department']}")
+        goals_data = await smart_goals_generator.agenerate_smart_goals(**inputs)
+        return _goals_response(goals_data)
+
+    except ValueError as e:
+        return jsonify({"error": f"Configuration error: {str(e)}"}), 500
+    except Exception as e:
+        print(f"Error in API endpoint: {e}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
+@async_view_for(routes.api_generate_smart_goals_stream)
+@rate_limited
+async def api_generate_smart_goals_stream():
+    """Async /api/generate-smart-goals/stream; the ASGI app sends the async body as it is produced"""
+    smart_goals_generator = await _get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    inputs, error = _generation_inputs(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    print(f"Streaming goals for {inputs['job_title']} in {inputs['department']}")
+
+    async def events():
+        goals_count = 0
+        used_fallback = False
+        try:
+            async for goal, is_fallback in smart_goals_generator.astream_smart_goals(**inputs):
+                goals_count += 1
+                used_fallback = used_fallback or is_fallback
+                yield _sse_event("goal", {"index": goals_count - 1, "goal": goal})
+        except Exception as e:
+            print(f"Error while streaming goals: {e}")
+            yield _sse_event("error", {"error": f"Internal server error: {str(e)}"})
+            return
+        yield _sse_done(goals_count, used_fallback)
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@async_view_for(routes.edit_user_goal)
+@rate_limited
+async def edit_user_goal():
+    """Async /api/edit-user-goal"""
+    try:
+        goal = request.get_json(force=True)
+    except Exception as e:
+        print(f"JSON parsing error: {str(e)}")
+        return jsonify({"message": f"Failed to parse JSON: {str(e)}"}), 400
+
+    goal_data, comment, error_response = _edit_request(goal)
+    if error_response:
+        return error_response
+
+    smart_goals_generator = await _get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
+
+    try:
+        edited_goal = await smart_goals_generator._aupdate_user_goal(goal_data, comment)
+        return _edit_response(goal_data, edited_goal)
+
+    except Exception as e:
+        print(f"Error updating user goal: {str(e)}")
+        return jsonify({"error": f"Failed in updating user goal: {str(e)}"}), 500
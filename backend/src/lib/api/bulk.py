@@ -0,0 +1,171 @@
+# lib/api/bulk.py
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+ROSTER_COLUMNS = ['name', 'jobTitle', 'department', 'goalDescription', 'keyResult', 'dueDate', 'managersGoal']
+GOAL_FIELDS = ['title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue']
+
+
+def _cell(value):
+    # Spreadsheet apps run text starting with =, + or @ as a formula. A leading '-'
+    # is left alone, since KPI text often starts with a bullet.
+    if isinstance(value, str) and value[:1] in ("=", "+", "@"):
+        return "'" + value
+    return value
+
+
+def _header_key(value):
+    return re.sub(r"[^a-z0-9]", "", str(value or "").lower())
+
+
+class RosterFile:
+    """
+    Roster spreadsheet uploaded for bulk generation.
+
+    The upload is copied to a temporary file and opened in read-only mode, so
+    rows can be read one at a time while the response is streaming, after the
+    request body has been closed. The first row must hold the column headers;
+    they are matched to ROSTER_COLUMNS ignoring case, spaces and punctuation,
+    so "Job Title" maps to jobTitle.
+    """
+
+    def __init__(self, file_obj):
+        handle, self.path = tempfile.mkstemp(suffix=".xlsx")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                shutil.copyfileobj(file_obj, file)
+            # openpyxl is only imported when a roster is actually uploaded
+            from openpyxl import load_workbook
+            self.workbook = load_workbook(self.path, read_only=True, data_only=True)
+        except Exception:
+            os.remove(self.path)
+            raise
+
+    def __iter__(self):
+        """Yield (row_number, row_dict) for every non-empty row."""
+        rows = self.workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        known = {_header_key(column): column for column in ROSTER_COLUMNS}
+        columns = [known.get(_header_key(cell)) for cell in header]
+
+        for row_number, row in enumerate(rows, start=2):
+            record = {
+                column: str(value).strip()
+                for column, value in zip(columns, row)
+                if column and value is not None and str(value).strip()
+            }
+            if record:
+                yield row_number, record
+
+    def close(self):
+        self.workbook.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def generate_for_rows(rows, generate, max_concurrency):
+    """
+    Run `generate(row)` for each roster row with at most `max_concurrency` calls
+    in flight, yielding (row_number, row, goals, error) in roster order.
+
+    Only a bounded window of rows is read ahead of the results being consumed,
+    so memory stays constant however long the roster is.
+    """
+    def run(row):
+        try:
+            return generate(row), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = deque()
+        for row_number, row in rows:
+            pending.append((row_number, row, executor.submit(run, row)))
+            if len(pending) >= max_concurrency:
+                row_number, row, future = pending.popleft()
+                yield (row_number, row) + future.result()
+        while pending:
+            row_number, row, future = pending.popleft()
+            yield (row_number, row) + future.result()
+
+
+def generate_in_batches(rows, generate_batch, batch_size, max_concurrency):
+    """
+    Like generate_for_rows, but hands roster rows to `generate_batch(rows)`
+    `batch_size` at a time, with at most `max_concurrency` batches in flight.
+    `generate_batch` returns one (goals, error) pair per row. Yields
+    (row_number, row, goals, error) in roster order.
+    """
+    def batches():
+        batch = []
+        for row_number, row in rows:
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                yield batch[0][0], batch
+                batch = []
+        if batch:
+            yield batch[0][0], batch
+
+    def generate(batch):
+        return generate_batch([row for _, row in batch])
+
+    for _, batch, results, error in generate_for_rows(batches(), generate, max_concurrency):
+        results = results or [(None, error)] * len(batch)
+        for (row_number, row), (goals, row_error) in zip(batch, results):
+            yield row_number, row, goals, row_error
+
+
+def jsonl_lines(results):
+    """Render bulk results as one JSON object per line."""
+    for row_number, row, goals, error in results:
+        yield json.dumps({
+            "row": row_number,
+            "name": row.get("name", ""),
+            "success": error is None,
+            "goals": goals or [],
+            "error": error
+        }) + "\n"
+
+
+def xlsx_chunks(results, chunk_size=64 * 1024):
+    """
+    Render bulk results into an XLSX workbook, one row per goal, and yield the
+    file in chunks. The workbook is built in write-only mode on a temporary file.
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("SMART Goals")
+    sheet.append(['row'] + ROSTER_COLUMNS + ['goalNumber'] + GOAL_FIELDS + ['error'])
+    for row_number, row, goals, error in results:
+        # Roster cells and goal text are user and LLM input, so they are escaped like the goals export
+        roster_values = [_cell(row.get(column, "")) for column in ROSTER_COLUMNS]
+        if error is not None:
+            sheet.append([row_number] + roster_values + [None] + [None] * len(GOAL_FIELDS) + [_cell(error)])
+            continue
+        for goal_number, goal in enumerate(goals, start=1):
+            sheet.append([row_number] + roster_values + [goal_number] + [_cell(str(goal.get(field, ""))) for field in GOAL_FIELDS] + [None])
+    yield from workbook_chunks(workbook, chunk_size)
+
+
+def workbook_chunks(workbook, chunk_size=64 * 1024):
+    """Save a write-only workbook to a temporary file and yield the file in chunks."""
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
@@ -0,0 +1,50 @@
+# lib/api/export.py
+
+import csv
+import io
+from .bulk import workbook_chunks, _cell
+
+EXPORT_COLUMNS = [
+    'id', 'employeeEmail', 'department', 'managerId', 'cycle', 'title', 'description',
+    'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue', 'createdAt'
+]
+
+
+def csv_chunks(goals, rows_per_chunk=500):
+    """
+    Render goals as CSV, one row per goal. The header is yielded at once and
+    then every `rows_per_chunk` rows, so the download starts immediately.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The BOM makes Excel open the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    rows = 0
+    for goal in goals:
+        writer.writerow([_cell(goal.get(column)) for column in EXPORT_COLUMNS])
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def xlsx_export_chunks(goals, chunk_size=64 * 1024):
+    """
+    Render goals into an XLSX workbook in openpyxl's write-only mode, which
+    keeps rows on disk rather than in memory. The file can only be sent once
+    the workbook is complete, so for large exports CSV starts sooner.
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Goals")
+    sheet.append(EXPORT_COLUMNS)
+    for goal in goals:
+        sheet.append([_cell(goal.get(column)) for column in EXPORT_COLUMNS])
+    yield from workbook_chunks(workbook, chunk_size)
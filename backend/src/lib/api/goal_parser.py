@@ -0,0 +1,156 @@
+# lib/api/goal_parser.py
+
+import json
+
+REQUIRED_GOAL_FIELDS = ('title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue')
+
+
+class GoalParseError(ValueError):
+    """Raised when LLM output does not contain well-formed goals."""
+
+
+def validate_goals(goals, required_fields=REQUIRED_GOAL_FIELDS):
+    """Check an already parsed list of goals and return it; raises GoalParseError."""
+    if not isinstance(goals, list) or not goals:
+        raise GoalParseError("Expected a non-empty list of goals")
+    for number, goal in enumerate(goals, 1):
+        if not isinstance(goal, dict):
+            raise GoalParseError(f"Goal {number} is not an object")
+        missing_fields = [field for field in required_fields if not goal.get(field)]
+        if missing_fields:
+            raise GoalParseError(f"Goal {number} is missing fields: {', '.join(missing_fields)}")
+    return goals
+
+
+class IncrementalGoalParser:
+    """
+    Parses the LLM's JSON array of goals while it is still streaming.
+
+    Text is fed in chunks as they arrive. Each top-level JSON object is parsed
+    and validated the moment its closing brace is seen, and returned from
+    `feed`. Braces inside JSON strings are handled, trailing commas are
+    dropped, and only the object currently being read is kept in memory.
+
+    Prose around the JSON is skipped: scanning starts after a ``` fence line,
+    or without a fence at the first `opening` character ("[" for a list of
+    goals, "{" for a single object), and stops when that array or object
+    closes. Quotes and braces in a preamble therefore cannot throw it off.
+    """
+
+    def __init__(self, required_fields=REQUIRED_GOAL_FIELDS, opening="["):
+        self.required_fields = required_fields
+        self.opening = opening
+        self.goals_count = 0
+        self._scanning = False
+        self._in_fence = False
+        self._line_start = True
+        self._fence_ticks = 0
+        self._skip_line = False
+        self._current = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._trailing_comma = None
+
+    def feed(self, text):
+        """Consume a chunk of LLM text and return the goals completed by it."""
+        goals = []
+        for char in text:
+            if self._fence_line(char):
+                continue
+            if not self._scanning:
+                if char != self.opening:
+                    continue
+                self._scanning = True
+            if self._depth:
+                self._current.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+                self._trailing_comma = None
+            elif char == "{":
+                if self._depth == 0:
+                    self._current = [char]
+                self._depth += 1
+                self._trailing_comma = None
+            elif char in "}]":
+                # Trailing commas are a common LLM slip that json.loads rejects
+                if self._trailing_comma is not None:
+                    del self._current[self._trailing_comma]
+                    self._trailing_comma = None
+                if char == "}" and self._depth:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        goals.append(self._parse_goal("".join(self._current)))
+                        self._current = []
+                        if self.opening == "{":
+                            self._scanning = False
+                elif char == "]" and not self._depth:
+                    # The end of the goals array; anything after it is prose
+                    self._scanning = False
+            elif char == "," and self._depth:
+                self._trailing_comma = len(self._current) - 1
+            elif not char.isspace():
+                self._trailing_comma = None
+        return goals
+
+    def close(self):
+        """Signal the end of the output; raises if it ended mid-goal or held no goals."""
+        if self._depth:
+            raise GoalParseError("LLM output ended in the middle of a goal")
+        if not self.goals_count:
+            raise GoalParseError("LLM output contained no goals")
+
+    @classmethod
+    def parse(cls, text, required_fields=REQUIRED_GOAL_FIELDS, opening="["):
+        """Parse a complete LLM response into a list of validated goals."""
+        parser = cls(required_fields, opening)
+        goals = parser.feed(text)
+        parser.close()
+        return goals
+
+    def _fence_line(self, char):
+        """Track ``` fence lines; returns True for characters that belong to one."""
+        if char == "\n":
+            self._line_start = True
+            self._fence_ticks = 0
+            self._skip_line = False
+            return False
+        if self._skip_line:
+            return True
+        # A raw newline cannot occur inside a JSON string, so a fence at the start of a line is always markup
+        if char == "`" and self._line_start:
+            self._fence_ticks += 1
+            if self._fence_ticks == 3:
+                self._in_fence = not self._in_fence
+                if self._in_fence:
+                    # Anything read from the prose before the fence is dropped
+                    self._current = []
+                    self._depth = 0
+                    self._in_string = False
+                    self._escaped = False
+                    self._trailing_comma = None
+                self._scanning = self._in_fence
+                # The rest of the fence line is its language tag
+                self._skip_line = True
+            return True
+        if not char.isspace():
+            self._line_start = False
+        return False
+
+    def _parse_goal(self, text):
+        try:
+            goal = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise GoalParseError(f"Goal {self.goals_count + 1} is not valid JSON: {e}")
+        missing_fields = [field for field in self.required_fields if not goal.get(field)]
+        if missing_fields:
+            raise GoalParseError(f"Goal {self.goals_count + 1} is missing fields: {', '.join(missing_fields)}")
+        self.goals_count += 1
+        return goal
@@ -0,0 +1,191 @@
+# lib/api/llm.py
+
+import ast
+import asyncio
+import glob
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+from src.lib.config import Config
+
+BACKEND_DIR = Path(__file__).resolve().parents[3]
+
+# Saved LLM responses, in either JSON or the Python repr the old route wrote
+DEFAULT_FIXTURES = [
+    str(BACKEND_DIR / "langchain_smart_goals_output.txt"),
+    str(BACKEND_DIR / "smart_goals_*.json"),
+]
+
+
+class StubLLMError(Exception):
+    """Simulated failure raised by StubChatModel."""
+
+
+def load_fixtures(patterns):
+    """
+    Load saved goal lists from files matching `patterns`. Each file may hold a
+    JSON array, a JSON object with a "goals" key, or a Python literal list.
+    Unreadable files are skipped.
+    """
+    fixtures = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            try:
+                text = Path(path).read_text(encoding="utf-8")
+                try:
+                    data = json.loads(text)
+                except json.JSONDecodeError:
+                    data = ast.literal_eval(text)
+                goals = data.get("goals") if isinstance(data, dict) else data
+                if isinstance(goals, list) and goals and all(isinstance(goal, dict) for goal in goals):
+                    fixtures.append(goals)
+            except Exception as e:
+                print(f"Warning: skipping LLM fixture {path}: {e}")
+    return fixtures
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for Gemini, for benchmarks and local development.
+
+    Responses replay saved goal lists in rotation, formatted like Gemini's
+    fenced JSON. Each call sleeps for `latency` seconds (plus up to
+    `latency_jitter`), fails with StubLLMError at `failure_rate`, and returns
+    truncated JSON at `malformed_rate`. The same `seed` gives the same sequence
+    of outcomes. Prompts for a goal update get a single goal object back, and
+    batched prompts an object keyed by the employee IDs they list.
+    """
+
+    latency: float = 0.5
+    latency_jitter: float = 0.0
+    failure_rate: float = 0.0
+    malformed_rate: float = 0.0
+    fixtures: List[Any] = []
+    seed: Optional[int] = 0
+    chunk_size: int = 64
+
+    _rng: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        if not self.fixtures:
+            self.fixtures = load_fixtures(DEFAULT_FIXTURES) or [[{
+                "title": "Stub goal",
+                "description": "Placeholder goal returned by the stub LLM backend.",
+                "kpi": "1 stub goal delivered",
+                "companyTopBetAlignment": "INVESTING FOR SCALE",
+                "framework3E": "ELEVATE",
+                "coreValue": "Simplify to Amplify"
+            }]]
+
+    @property
+    def _llm_type(self):
+        return "stub"
+
+    def _next_call(self, prompt):
+        """Pick this call's delay, outcome and response text."""
+        with self._lock:
+            self._calls += 1
+            goals = self.fixtures[(self._calls - 1) % len(self.fixtures)]
+            delay = self.latency + self._rng.uniform(0, self.latency_jitter)
+            roll = self._rng.random()
+
+        if "User's Update Request" in prompt:
+            text = json.dumps(goals[0], indent=2)
+        elif "employee IDs" in prompt:
+            employee_ids = re.findall(r"^### (E\d+)$", prompt, re.MULTILINE)
+            text = f"```json\n{json.dumps({employee_id: goals for employee_id in employee_ids}, indent=2)}\n```"
+        else:
+            text = f"```json\n{json.dumps(goals, indent=2)}\n```"
+        if roll < self.failure_rate:
+            return delay, StubLLMError("Simulated LLM failure"), ""
+        if roll < self.failure_rate + self.malformed_rate:
+            return delay, None, text[:len(text) // 2]
+        return delay, None, text
+
+    @staticmethod
+    def _prompt_text(messages):
+        return "\n".join(str(message.content) for message in messages)
+
+    def _chunks(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, error, text = self._next_call(self._prompt_text(messages))
+        time.sleep(delay)
+        if error:
+            raise error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, error, text = self._next_call(self._prompt_text(messages))
+        chunks = self._chunks(text)
+        # Half the latency before the first token, the rest spread over the chunks
+        time.sleep(delay / 2)
+        if error:
+            raise error
+        for chunk in chunks:
+            time.sleep(delay / 2 / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    # The async forms sleep on the event loop, like a real network call, instead of in an executor thread
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, error, text = self._next_call(self._prompt_text(messages))
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, error, text = self._next_call(self._prompt_text(messages))
+        chunks = self._chunks(text)
+        await asyncio.sleep(delay / 2)
+        if error:
+            raise error
+        for chunk in chunks:
+            await asyncio.sleep(delay / 2 / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+def make_llm(backend=None, api_key=None, max_output_tokens=None):
+    """
+    Build the chat model named by `backend` (LLM_BACKEND by default): 'gemini'
+    for Google Gemini, or 'stub' for StubChatModel configured from LLM_STUB_*.
+    """
+    backend = (backend or Config.LLM_BACKEND).lower()
+    if backend == "stub":
+        fixtures = [pattern.strip() for pattern in Config.LLM_STUB_FIXTURES.split(",") if pattern.strip()]
+        return StubChatModel(
+            latency=Config.LLM_STUB_LATENCY,
+            latency_jitter=Config.LLM_STUB_LATENCY_JITTER,
+            failure_rate=Config.LLM_STUB_FAILURE_RATE,
+            malformed_rate=Config.LLM_STUB_MALFORMED_RATE,
+            fixtures=load_fixtures(fixtures) if fixtures else [],
+            seed=Config.LLM_STUB_SEED
+        )
+    if backend != "gemini":
+        raise ValueError(f"Unknown LLM backend: {backend}")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    if not api_key:
+        raise ValueError("Gemini API key must be provided as parameter or environment variable")
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        temperature=0.7,
+        max_output_tokens=max_output_tokens or Config.LLM_MAX_OUTPUT_TOKENS,
+        google_api_key=api_key,
+        timeout=Config.LLM_TIMEOUT,
+        # Retries are handled by SMARTGoalsGenerator._invoke_with_retries so the circuit breaker sees every failure
+        max_retries=0
+    )
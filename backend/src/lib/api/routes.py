@@ -1,34 +1,69 @@
-from flask import request, jsonify, g, session
+from flask import request, jsonify, g, session, Response, stream_with_context
 from datetime import datetime, timedelta
 from . import api_blueprint
-from ..utils.auth import login_required, SECRET_KEY
-from .smart_goals import SMARTGoalsGenerator
+from ..utils.auth import login_required, roles_required, user_role, SECRET_KEY
+from .bulk import RosterFile, generate_in_batches, jsonl_lines, xlsx_chunks
+from .export import csv_chunks, xlsx_export_chunks
+from .goal_parser import REQUIRED_GOAL_FIELDS
 from src.lib.db.database import save_goal
-import bcrypt
 import jwt 
-from src.lib.db.db_connection import get_db_connection
 
-from src.lib.db.database import get_user
+from src.lib.db.database import get_user, get_profile, find_similar_goals, iter_goals
+from src.lib.utils.jobs import JobQueue
+from src.lib.utils.prompts import PromptStore
+from src.lib.utils.hashing import password_hasher, HashPoolSaturated
+from src.lib.utils.rate_limit import rate_limited, bulk_rate_limited, bulk_rate_limiter, client_key
+from src.lib.utils.metrics import metrics
+from src.lib.utils.breaker import CircuitBreaker
+from src.lib.config import Config
 import os
 import json
+import itertools
+import threading
+
+# prompts.json is parsed once per change and shared by the generator and /api/prompts
+prompt_store = PromptStore()
+
+# Shared by the generator and /api/health, so health checks never build the LLM client
+llm_breaker = CircuitBreaker()
+
+# The generator pulls in LangChain and the Gemini client, so it is created on
+# first use in each worker rather than at import, keeping startup (and the
+# gunicorn --preload master) light
+_smart_goals_generator = None
+_generator_lock = threading.Lock()
+
+def get_generator():
+    """Return the SMART Goals Generator, creating it on first use; None if it cannot be configured."""
+    global _smart_goals_generator
+    if _smart_goals_generator is None:
+        with _generator_lock:
+            if _smart_goals_generator is None:
+                try:
+                    from .smart_goals import SMARTGoalsGenerator
+                    api_key = os.getenv("GEMINI_API_KEY")
+                    _smart_goals_generator = SMARTGoalsGenerator(api_key=api_key, prompt_store=prompt_store, breaker=llm_breaker)
+                    print("SMART Goals Generator initialized successfully")
+                except Exception as e:
+                    print(f"Failed to initialize SMART Goals Generator: {e}")
+    return _smart_goals_generator
+
+def _run_generation_job(inputs):
+    smart_goals_generator = get_generator()
+    if not smart_goals_generator:
+        raise ValueError("SMART Goals Generator not initialized")
+    goals_data = smart_goals_generator.generate_smart_goals(**inputs)
+    return {
+        "goals": goals_data,
+        "timestamp": datetime.now().isoformat(),
+        "goals_count": len(goals_data),
+        "method": "langchain"
+    }
 
-def load_prompts():
-    prompts_path = os.path.join(os.path.dirname(__file__), '..', 'utils', 'prompts.json')
-    try:
-        with open(prompts_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Warning: Could not load prompts.json: {e}")
-        return {}
-
-# Initialize SMART Goals Generator
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    smart_goals_generator = SMARTGoalsGenerator(api_key=api_key)
-    print("SMART Goals Generator initialized successfully")
-except Exception as e:
-    print(f"Failed to initialize SMART Goals Generator: {e}")
-    smart_goals_generator = None
+job_queue = JobQueue({"generate_smart_goals": _run_generation_job})
+
+# Each export holds a database connection for as long as it streams
+_export_slots = threading.BoundedSemaphore(Config.EXPORT_MAX_CONCURRENT)
 
 @api_blueprint.route('/api/health', methods=['GET'])
 def health_check():
@@ -36,21 +71,115 @@ def health_check():
     return jsonify({
         "status": "healthy", 
         "timestamp": datetime.now().isoformat(),
-        "generator_status": "initialized" if smart_goals_generator else "failed"
+        "generator_status": "initialized" if _smart_goals_generator else "not_initialized",
+        "llm_circuit": llm_breaker.status(),
+        "password_hashing": password_hasher.stats()
     })
 
+def _too_many_requests(message, retry_after=1):
+    response = jsonify({"error": message, "message": message})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
+def _generation_inputs(data):
+    """Validate a goal generation request body and map it to generator arguments."""
+    with metrics.timer("validate") as timer:
+        required_fields = ['jobTitle', 'department', 'goalDescription', 'keyResult', 'dueDate']
+        missing_fields = [field for field in required_fields if field not in data or not data[field]]
+        if missing_fields:
+            timer.outcome = "invalid"
+            return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+        return {
+            "job_title": data['jobTitle'],
+            "department": data['department'],
+            "goal_description": data['goalDescription'],
+            "key_results": data['keyResult'],
+            "deadline": data['dueDate'],
+            "managers_goal": data.get('managersGoal', 'Support team objectives and organizational goals')
+        }, None
+
+def _generator_missing():
+    return jsonify({
+        "error": "SMART Goals Generator not initialized. Please check your Google API key configuration."
+    }), 500
+
+def _goals_response(goals_data):
+    return jsonify({
+        "success": True,
+        "goals": goals_data, # goals_data is a list of dictionaries each containing goal details
+        "timestamp": datetime.now().isoformat(),
+        "goals_count": len(goals_data),
+        "method": "langchain"
+    })
+
+def _missing_goal_fields(goal):
+    """Error message for a goal without all of its required fields, or None."""
+    missing_fields = [field for field in REQUIRED_GOAL_FIELDS if not goal.get(field)]
+    if missing_fields:
+        return f"Missing required fields: {', '.join(missing_fields)}"
+    return None
+
+def _edit_request(body):
+    """Validate an edit request body; returns (goal, comment, error response)."""
+    if not body:
+        return None, None, (jsonify({"error": "No JSON data provided"}), 400)
+    goal_data = body.get("goal", {})
+    error = _missing_goal_fields(goal_data)
+    if error:
+        return None, None, (jsonify({"error": error}), 400)
+    return goal_data, body.get("comment", ""), None
+
+def _edit_response(goal_data, edited_goal):
+    if not edited_goal:
+        return jsonify({"error": "Failed to update user goal"}), 500
+    # send the user edited goal back as response, with the fields the edit changed
+    return jsonify({
+        "success": True,
+        "goal": edited_goal,
+        "changedFields": [field for field in REQUIRED_GOAL_FIELDS if edited_goal.get(field) != goal_data.get(field)],
+        "message": "User goal updated successfully"
+    }), 200
+
+def _sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _sse_done(goals_count, used_fallback):
+    return _sse_event("done", {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "goals_count": goals_count,
+        "method": "fallback" if used_fallback else "langchain"
+    })
+
+@api_blueprint.route('/api/prompts', methods=['GET'])
+def get_prompts():
+    """Serve prompts.json with a strong ETag so clients can revalidate with If-None-Match"""
+    snapshot = prompt_store.current()
+    response = Response(snapshot.raw or b"{}", mimetype="application/json")
+    response.set_etag(snapshot.digest)
+    response.headers["Cache-Control"] = "public, max-age=60, must-revalidate"
+    return response.make_conditional(request)
+
+@api_blueprint.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Latency histograms and counters from every worker, in Prometheus text format"""
+    if Config.METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {Config.METRICS_TOKEN}":
+        return jsonify({"error": "Authentication required"}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @api_blueprint.route('/api/generate-smart-goals', methods=['POST'])
 # @login_required
+@rate_limited
 def api_generate_smart_goals():
     """API endpoint to generate 3 SMART goals using LangChain"""
     print("Received request:", request.json)  # Debug log
     
     try:
         # Check if generator is initialized
+        smart_goals_generator = get_generator()
         if not smart_goals_generator:
-            return jsonify({
-                "error": "SMART Goals Generator not initialized. Please check your Google API key configuration."
-            }), 500
+            return _generator_missing()
         
         data = request.get_json()
         
@@ -58,41 +187,17 @@ def api_generate_smart_goals():
         if not data:
             return jsonify({"error": "No JSON data provided"}), 400
         
-        # Validate required fields
-        required_fields = ['jobTitle', 'department', 'goalDescription', 'keyResult', 'dueDate']
-        missing_fields = [field for field in required_fields if field not in data or not data[field]]
-        
-        if missing_fields:
-            return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-        
-        # Extract data with default values
-        job_title = data['jobTitle']
-        department = data['department']
-        goal_description = data['goalDescription']
-        key_results = data['keyResult']
-        deadline = data['dueDate']
-        managers_goal = data.get('managersGoal', 'Support team objectives and organizational goals')
+        inputs, error = _generation_inputs(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        print(f"Generating goals for {job_title} in {department}")
+        print(f"Generating goals for {inputs['job_title']} in {inputs['department']}")
         
         # Generate 3 SMART goals using LangChain
-        goals_data = smart_goals_generator.generate_smart_goals(
-            job_title=job_title,
-            department=department,
-            goal_description=goal_description,
-            key_results=key_results,
-            deadline=deadline,
-            managers_goal=managers_goal
-        )
+        goals_data = smart_goals_generator.generate_smart_goals(**inputs)
         
         # print("Generated goals:", goals_data)  # Debug log
-          # Save to file (optional)
-        try:
-            with open("langchain_smart_goals_output.txt", "w", encoding="utf-8") as file:
-                file.write(str(goals_data))
-        except Exception as e:
-            print(f"Warning: Could not save to file: {e}")
-
+        # Every generation is recorded in the audit log by the generator
         
         '''
         goals_data is like:
@@ -111,13 +216,7 @@ def api_generate_smart_goals():
 
 
         # Return response with goals array
-        return jsonify({
-            "success": True,
-            "goals": goals_data, # goals_data is a list of dictionaries each containing goal details
-            "timestamp": datetime.now().isoformat(),
-            "goals_count": len(goals_data),
-            "method": "langchain"
-        })
+        return _goals_response(goals_data)
         
     except ValueError as e:
         return jsonify({"error": f"Configuration error: {str(e)}"}), 500
@@ -127,7 +226,144 @@ def api_generate_smart_goals():
 
 
 
+@api_blueprint.route('/api/generate-smart-goals/stream', methods=['POST'])
+# @login_required
+@rate_limited
+def api_generate_smart_goals_stream():
+    """Streaming variant of /api/generate-smart-goals, sending each goal as a Server-Sent Event"""
+    smart_goals_generator = get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    inputs, error = _generation_inputs(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    print(f"Streaming goals for {inputs['job_title']} in {inputs['department']}")
+
+    def events():
+        goals_count = 0
+        used_fallback = False
+        try:
+            for goal, is_fallback in smart_goals_generator.stream_smart_goals(**inputs):
+                goals_count += 1
+                used_fallback = used_fallback or is_fallback
+                yield _sse_event("goal", {"index": goals_count - 1, "goal": goal})
+        except Exception as e:
+            print(f"Error while streaming goals: {e}")
+            yield _sse_event("error", {"error": f"Internal server error: {str(e)}"})
+            return
+        yield _sse_done(goals_count, used_fallback)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+
+@api_blueprint.route('/api/generate-smart-goals/jobs', methods=['POST'])
+# @login_required
+@rate_limited
+def api_submit_smart_goals_job():
+    """Queue SMART goal generation in the background and return a job id right away"""
+    smart_goals_generator = get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    inputs, error = _generation_inputs(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        job_id = job_queue.submit("generate_smart_goals", inputs)
+    except Exception as e:
+        print(f"Error queueing generation job: {e}")
+        return jsonify({"error": f"Failed to queue job: {str(e)}"}), 500
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "pending",
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+@api_blueprint.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Return the status of a background job, and its result once it has finished"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+
+@api_blueprint.route('/api/generate-smart-goals/bulk', methods=['POST'])
+# @login_required
+@bulk_rate_limited
+def api_generate_smart_goals_bulk():
+    """
+    Generate goals for every employee in an uploaded XLSX roster and stream the results back.
+    Each batch is charged one token per employee from the caller's bulk bucket,
+    separate from the interactive one, and waits at most BULK_RATE_LIMIT_MAX_WAIT
+    for them; the rows of a batch that cannot get its tokens fail with the rate
+    limit error, so no request worker sleeps without limit.
+    """
+    smart_goals_generator = get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
+
+    roster = request.files.get('file')
+    if not roster:
+        return jsonify({"error": "No roster file provided"}), 400
+
+    output_format = request.args.get('format', 'jsonl').lower()
+    if output_format not in ('jsonl', 'xlsx'):
+        return jsonify({"error": "format must be 'jsonl' or 'xlsx'"}), 400
+
+    # Batches run on pool threads, outside the request context
+    limiter_key = client_key()
+
+    def generate_batch(batch):
+        # Valid rows share one LLM call per batch; invalid rows get their own error
+        checked = [_generation_inputs(row) for row in batch]
+        requests = [inputs for inputs, error in checked if not error]
+        if requests:
+            bulk_rate_limiter.acquire(limiter_key, cost=len(requests))
+        goals = iter(smart_goals_generator.generate_smart_goals_batch(requests) if requests else [])
+        return [(None, error) if error else (next(goals), None) for _, error in checked]
+
+    try:
+        rows = RosterFile(roster.stream)
+    except Exception as e:
+        print(f"Error reading roster: {e}")
+        return jsonify({"error": f"Could not read roster: {str(e)}"}), 400
+
+    results = generate_in_batches(rows, generate_batch, Config.LLM_BATCH_SIZE, Config.BULK_MAX_CONCURRENCY)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if output_format == 'xlsx':
+        response = Response(xlsx_chunks(results),
+                            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            headers={"Content-Disposition": f"attachment; filename=smart_goals_{timestamp}.xlsx"})
+    else:
+        response = Response(jsonl_lines(results),
+                            mimetype="application/x-ndjson",
+                            headers={"Content-Disposition": f"attachment; filename=smart_goals_{timestamp}.jsonl"})
+    response.call_on_close(rows.close)
+    return response
+
+
+
 @api_blueprint.route('/api/save-user-goal', methods=['POST']) 
+@login_required
 def save_user_goal():
     try:
         goal = request.get_json(force=True)
@@ -143,23 +379,32 @@ def save_user_goal():
     
 
     
-    required_fields = ['title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue']
-    missing_fields = [field for field in required_fields if not goal.get(field)]
+    error = _missing_goal_fields(goal)
+    if error:
+        return jsonify({"error": error}), 400
 
+    # The goal belongs to the logged in user: employee details come from their cached
+    # profile (or the token), never from the request body; only the cycle may be chosen
+    try:
+        owner = dict(get_profile(g.user['email']) or g.user)
+    except Exception as e:
+        print(f"Could not load profile for {g.user.get('email')}: {str(e)}")
+        owner = dict(g.user)
+    owner['cycle'] = goal.get('cycle')
 
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
+    # Durable saves wait until the goal is written, the rest are batched in the background
+    durable = request.args.get('durable', '').lower() in ('1', 'true', 'yes') or goal.get('durable') is True
 
     # now save the goal to the DB
     try:
-        response = save_goal(goal)
+        response = save_goal(goal, owner=owner, durable=durable)
         if not response:
             return jsonify({"error": "Failed to save user goal"}), 500
         # send the user goal back as response
         return jsonify({
             "success": True,
             "goal": response,
-            "message": "User goal saved successfully"
+            "message": "User goal saved successfully" if durable else "User goal queued for saving"
         }), 200
 
     except Exception as e:
@@ -170,8 +415,78 @@ def save_user_goal():
 
 
 
+@api_blueprint.route('/api/goals/similar', methods=['GET'])
+@login_required
+def similar_goals():
+    """Find saved goals similar to a draft, so an existing goal can be reused instead of generating a new one"""
+    query = request.args.get('q') or request.args.get('goalDescription', '')
+    if not query.strip():
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', Config.SIMILAR_GOALS_LIMIT)), 1), Config.SIMILAR_GOALS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    try:
+        goals = find_similar_goals(query, department=request.args.get('department'), limit=limit)
+    except Exception as e:
+        print(f"Error searching goals: {str(e)}")
+        return jsonify({"error": "Goal search is unavailable, please try again"}), 503
+
+    return jsonify({
+        "success": True,
+        "query": query,
+        "goals": goals,
+        "count": len(goals)
+    }), 200
+
+
+
+@api_blueprint.route('/api/goals/export', methods=['GET'])
+@roles_required('admin', 'hr')
+def export_goals():
+    """Stream saved goals as CSV or XLSX, filtered by department, manager and cycle (HR and admins only)"""
+    output_format = request.args.get('format', 'csv').lower()
+    if output_format not in ('csv', 'xlsx'):
+        return jsonify({"error": "format must be 'csv' or 'xlsx'"}), 400
+
+    if not _export_slots.acquire(blocking=False):
+        return _too_many_requests("Too many exports in progress, please try again shortly", retry_after=10)
+
+    try:
+        rows = iter_goals(
+            department=request.args.get('department'),
+            manager_id=request.args.get('manager'),
+            cycle=request.args.get('cycle')
+        )
+        # Run the query before answering, so a database error is still a 503 rather than a broken download
+        first = next(rows, None)
+    except Exception as e:
+        _export_slots.release()
+        print(f"Error exporting goals: {str(e)}")
+        return jsonify({"error": "Goal export is unavailable, please try again"}), 503
+
+    goals = itertools.chain([first], rows) if first else iter(())
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if output_format == 'xlsx':
+        response = Response(xlsx_export_chunks(goals),
+                            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            headers={"Content-Disposition": f"attachment; filename=goals_{timestamp}.xlsx"})
+    else:
+        response = Response(csv_chunks(goals),
+                            mimetype="text/csv",
+                            headers={"Content-Disposition": f"attachment; filename=goals_{timestamp}.csv"})
+    # Closing the goal iterator, even mid-download, returns its DB connection
+    response.call_on_close(rows.close)
+    response.call_on_close(_export_slots.release)
+    return response
+
+
+
 @api_blueprint.route('/api/edit-user-goal', methods=['POST']) # assuming this function can be only called by authenticated users
 # @login_required
+@rate_limited
 def edit_user_goal():
     try:
         goal = request.get_json(force=True)
@@ -180,36 +495,18 @@ def edit_user_goal():
         return jsonify({"message": f"Failed to parse JSON: {str(e)}"}), 400
 
     # Validate input
-    if not goal:
-        return jsonify({"error": "No JSON data provided"}), 400
-
-    # Validate required fields
-    # for ele in goal['goal']:
-    #     print(f"Goal element: {ele}", flush=True)
+    goal_data, comment, error_response = _edit_request(goal)
+    if error_response:
+        return error_response
 
-    goal_data = goal.get("goal", {})
-    
-    required_fields = ['title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue']
-    missing_fields = [field for field in required_fields if not goal_data.get(field)]
-
-
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-
-    comment = goal.get("comment", "")
+    smart_goals_generator = get_generator()
+    if not smart_goals_generator:
+        return _generator_missing()
 
     # Call the function to update the user goal in the database
     try:
         edited_goal = smart_goals_generator._update_user_goal(goal_data, comment) # to be implemented in smart_goals.py
-        if not edited_goal:
-            return jsonify({"error": "Failed to update user goal"}), 500
-   
-        # send the user edited goal back as response
-        return jsonify({
-            "success": True,
-            "goal": edited_goal,
-            "message": "User goal updated successfully"
-        }), 200
+        return _edit_response(goal_data, edited_goal)
 
     except Exception as e:
         print(f"Error updating user goal: {str(e)}")
@@ -233,19 +530,26 @@ def login():
         print(f"Missing email or password: email={email}, password={'*' * len(password) if password else None}", flush=True)
         return jsonify({"message": "Email and password are required"}), 400
     
-    # Hardcoded authentication - no database lookup
-    HARDCODED_EMAIL = 'antech@gmail.com'
-    HARDCODED_PASSWORD = 'antech123'
-    
-    if email != HARDCODED_EMAIL or password != HARDCODED_PASSWORD:
+    try:
+        user = get_user(email, password)
+    except HashPoolSaturated as e:
+        return _too_many_requests(str(e))
+    except Exception as e:
+        print(f"Error looking up user {email}: {str(e)}", flush=True)
+        return jsonify({"message": "Authentication service unavailable, please try again"}), 503
+
+    if not user:
         print(f"Invalid credentials for email: {email}", flush=True)
         return jsonify({"message": "Invalid email or password"}), 401
     
     # Generate JWT token
     token_payload = {
-        'email': email,
-        'name': 'Demo User',
-        'role': 'user',
+        'email': user['email'],
+        'name': user['name'],
+        'role': user_role(user['email'], user['department']),
+        'department': user['department'],
+        'designation': user['designation'],
+        'manager_id': user['manager_id'],
         'exp': datetime.utcnow() + timedelta(days=1),
         'iat': datetime.utcnow()  # Issued at time
     }
@@ -253,17 +557,16 @@ def login():
     token = jwt.encode(token_payload, SECRET_KEY, algorithm='HS256')
     print(f"Login successful for user: {email}", flush=True)
 
-    prompts_data = load_prompts()
     return jsonify({
         "token": token,
         "user": {
-            "email": email,
-            "name": "Demo User",
-            "department": "Engineering",
-            "designation": "Software Engineer",
-            "managers_goal": "Support team objectives and organizational goals"
-        },
-        "prompts": prompts_data
+            "email": user['email'],
+            "name": user['name'],
+            "department": user['department'],
+            "designation": user['designation'],
+            "managers_goal": user['managers_goal'],
+            "role": token_payload['role']
+        }
     }), 200
 
 @api_blueprint.route('/api/auth/register', methods=['POST'])
@@ -283,7 +586,9 @@ def register():
     # Implement your user storage logic here (e.g., check if user exists, store user)
     # For now, just return success
     try:
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = password_hasher.hash_password(password)
+    except HashPoolSaturated as e:
+        return _too_many_requests(str(e))
     except Exception as e:
         print(f"Password hashing error: {str(e)}")
         return jsonify({"message": "Error hashing password"}), 500
@@ -309,8 +614,10 @@ def hash_password():
     if not password:
         return jsonify({"error": "Password is required"}), 400
     try:
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = password_hasher.hash_password(password)
         return jsonify({"hashed_password": hashed}), 200
+    except HashPoolSaturated as e:
+        return _too_many_requests(str(e))
     except Exception as e:
         print(f"Password hashing error: {str(e)}")
         return jsonify({"message": "Error hashing password"}), 500
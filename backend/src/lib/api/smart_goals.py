@@ -1,31 +1,82 @@
 import os
-import json
 import time
-import re
-from pathlib import Path
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import random
+import hashlib
 from langchain_core.prompts import PromptTemplate
-from sympy import true
+from src.lib.utils.cache import ResultCache, normalize_text
+from src.lib.utils.prompts import PromptStore, DEFAULT_PROMPTS_PATH
+from src.lib.utils.breaker import CircuitBreaker, CircuitOpenError
+from src.lib.utils.singleflight import SingleFlight
+from src.lib.utils.metrics import metrics, current_endpoint
+from src.lib.utils.audit import audit_log
+from .goal_parser import IncrementalGoalParser, GoalParseError, REQUIRED_GOAL_FIELDS, validate_goals
+from .llm import make_llm
+from src.lib.config import Config
 
+# Goal fields whose value is one of the prompts.json entries, by reference ID prefix
+REFERENCE_FIELDS = {'coreValue': 'CV', 'framework3E': 'E', 'companyTopBetAlignment': 'TB'}
 
 
+class _Attempts:
+    """
+    Retry bookkeeping for one LLM request, shared by the sync and async paths.
+
+    Every attempt goes through the shared circuit breaker: `begin` returns
+    False, with CircuitOpenError as `last_error`, instead of letting a call
+    through while it is open. `failed` returns the jittered backoff before the
+    next attempt, or None once `max_retries` attempts are used up or no retry
+    fits in the LLM_RETRY_BUDGET seconds left. Only errors from the LLM call
+    itself count as breaker failures, not unparseable output.
+
+    `begin`, `succeeded` and `failed` (with `llm_error`) write to the SQLite
+    breaker, so async callers run them in a thread.
+    """
+
+    def __init__(self, breaker, max_retries):
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.deadline = time.monotonic() + Config.LLM_RETRY_BUDGET
+        self.attempt = 0
+        self.started = None
+        self.last_error = None
+
+    def begin(self):
+        if not self.breaker.allow():
+            self.last_error = CircuitOpenError("LLM circuit is open")
+            return False
+        self.started = time.monotonic()
+        return True
+
+    def succeeded(self):
+        self.breaker.record_success(time.monotonic() - self.started)
+
+    def failed(self, error, llm_error=True):
+        if llm_error:
+            self.breaker.record_failure(time.monotonic() - self.started)
+        self.last_error = error
+        self.attempt += 1
+        print(f"Attempt {self.attempt} failed: {error}")
+        if self.attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(Config.LLM_RETRY_MAX_DELAY, 0.5 * 2 ** (self.attempt - 1)))
+        if time.monotonic() + delay >= self.deadline:
+            return None
+        return delay
+
 
 class SMARTGoalsGenerator:
-    def __init__(self, api_key=None, prompts_path = Path(__file__).parent.parent / "utils" / "prompts.json"):
+    def __init__(self, api_key=None, prompts_path=DEFAULT_PROMPTS_PATH, cache=None, prompt_store=None, breaker=None, llm=None, audit=None):
+        # Any LangChain chat model can be passed in; by default LLM_BACKEND picks Gemini or the local stub
         api_key = api_key or os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Gemini API key must be provided as parameter or environment variable")
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.7,
-            max_output_tokens=2000,
-            google_api_key=api_key
-        )
-        self.prompts_data = self._load_prompts(prompts_path)
-        self.template = (
-            "Context: {context}\n"
-            "Instructions: Generate 3 SMART goals as a JSON array with fields: "
-            "title, description, kpi, companyTopBetAlignment, framework3E, coreValue. "
+        self.llm = llm or make_llm(api_key=api_key)
+        # Batched calls answer for several employees at once and need a larger output limit
+        self.batch_llm = llm or make_llm(api_key=api_key, max_output_tokens=Config.LLM_BATCH_MAX_OUTPUT_TOKENS)
+        self.model_name = getattr(self.llm, "model", None) or getattr(self.llm, "_llm_type", type(self.llm).__name__)
+        self.audit_log = audit or audit_log
+        self.prompt_store = prompt_store or PromptStore(prompts_path)
+        goal_fields = "title, description, kpi, companyTopBetAlignment, framework3E, coreValue. "
+        goal_rules = (
             "Each goal must be concise and specific, measurable, achievable, relevant, time-bound, "
             "and aligned with the most relevant company bet, 3E framework, and core value. "
             "For each goal, the 'kpi' field should include both the KPI metric and the KPI points system (maximum 5 points per goal), dont make the kpi points sytem different but include it under the kpi field only  followed in bullets:\n"
@@ -36,70 +87,459 @@ class SMARTGoalsGenerator:
             "- 1 point: Underperform or do not achieve the goal\n"
             "This KPI points system will be used for end-of-year performance reviews and bonuses, so make it clear and relevant for each goal. Also, ensure each goal addresses the manager's goal."
         )
+        self.template = (
+            "Context: {context}\n"
+            "Instructions: Generate 3 SMART goals as a JSON array with fields: " + goal_fields + goal_rules
+        )
+        # Bulk work sends the shared context once for several employees, each under an ID such as E1
+        self.batch_template = (
+            "Shared Context:\n{context}\n\n"
+            "Employees:\n{employees}\n\n"
+            "Instructions: For each employee above, generate 3 SMART goals with fields: " + goal_fields + goal_rules + "\n"
+            "Return ONLY a JSON object whose keys are the employee IDs ({employee_ids}) "
+            "and whose values are that employee's JSON array of 3 goals."
+        )
+        # Edits send only the goal and the comment, list the reference options by
+        # ID, and ask for the changed fields alone
+        self.update_template = (
+            "Update this SMART goal according to the user's request.\n\n"
+            "Title: {original_title}\n"
+            "Description: {original_description}\n"
+            "KPI: {original_kpi}\n"
+            "Company Top Bet Alignment: {original_alignment}\n"
+            "3E Framework: {original_framework}\n"
+            "Core Value: {original_core_value}\n\n"
+            "User's Update Request: {user_comment}\n\n"
+            "Reference IDs:\n"
+            "Core Values: {core_values}\n"
+            "3E Framework: {framework_3e}\n"
+            "Company Top Bets: {company_top_bets}\n\n"
+            "Keep the goal specific, measurable, achievable, relevant and time-bound. "
+            "Return ONLY a JSON object with the changed fields, using the keys "
+            "title, description, kpi, companyTopBetAlignment, framework3E, coreValue. "
+            "Give companyTopBetAlignment, framework3E and coreValue as a reference ID. "
+            "A changed kpi must keep its 5-point scoring system (5: significantly exceed, 4: exceed, "
+            "3: fully achieve, 2: partially achieve, 1: underperform). "
+            "Return {{}} if nothing needs to change."
+        )
+        # Cached results are only valid for the prompts and templates that produced them; batch
+        # results are cached under the same keys as single generations, so its template counts too
+        self.template_digest = hashlib.sha256(
+            (self.template + self.batch_template + self.update_template).encode("utf-8")
+        ).hexdigest()
+        self.cache = cache if cache is not None else ResultCache()
+        self.breaker = breaker or CircuitBreaker()
+        self.single_flight = SingleFlight(self.cache.get)
+        self._build_chains()
 
-    def _load_prompts(self, path):
-        try:
-            with open(path, "r") as file:
-                return json.load(file)
-        except Exception:
-            print("error mate")
-            return {}
+    def _build_chains(self):
+        """Build the prompt | llm chains once; they are reused by every request."""
+        self.chain = PromptTemplate(input_variables=["context"], template=self.template) | self.llm
+        self.update_chain = PromptTemplate(
+            input_variables=[
+                "original_title", "original_description", "original_kpi",
+                "original_alignment", "original_framework", "original_core_value",
+                "user_comment", "core_values", "framework_3e", "company_top_bets"
+            ],
+            template=self.update_template
+        ) | self.llm
+        self.batch_chain = PromptTemplate(
+            input_variables=["context", "employees", "employee_ids"], template=self.batch_template
+        ) | self.batch_llm
+
+    @property
+    def prompts_data(self):
+        return self.prompt_store.current().data
 
     def build_context(self, job_title, department, goal_description, key_results, deadline, managers_goal):
-        examples = self.prompts_data.get(department.lower(), {}).get("examples", [])
-        core_values = self.prompts_data.get("core_values", [])
-        framework_3e = self.prompts_data.get("framework_3e", [])
-        company_top_bets = self.prompts_data.get("company_top_bets", [])
-        return (
-            f"Job Title: {job_title}\n"
-            f"Department: {department}\n"
-            f"Goal Description: {goal_description}\n"
-            f"Key Results: {key_results}\n"
-            f"Deadline: {deadline}\n"
-            f"Manager's Goal: {managers_goal}\n"
-            f"Example Goals: {examples}\n"
-            f"Core Values: {core_values}\n"
-            f"3E Strategic Framework: {framework_3e}\n"
-            f"Company Top Bets: {company_top_bets}"
+        with metrics.timer("build_context"):
+            snapshot = self.prompt_store.current()
+            return (
+                f"Job Title: {job_title}\n"
+                f"Department: {department}\n"
+                f"Goal Description: {goal_description}\n"
+                f"Key Results: {key_results}\n"
+                f"Deadline: {deadline}\n"
+                f"Manager's Goal: {managers_goal}\n"
+                + snapshot.context_section(department, f"{goal_description} {key_results} {managers_goal}")
+            )
+
+    def build_batch_context(self, requests):
+        """
+        Return (context, employees) for a batched prompt: the shared core values,
+        3E and top bets, and one block per employee headed by its ID (E1, E2, ...)
+        with that employee's inputs and department examples.
+        """
+        with metrics.timer("build_context"):
+            snapshot = self.prompt_store.current()
+            queries = [f"{inputs['goal_description']} {inputs['key_results']} {inputs['managers_goal']}" for inputs in requests]
+            employees = "\n\n".join(
+                f"### E{number}\n"
+                f"Job Title: {inputs['job_title']}\n"
+                f"Department: {inputs['department']}\n"
+                f"Goal Description: {inputs['goal_description']}\n"
+                f"Key Results: {inputs['key_results']}\n"
+                f"Deadline: {inputs['deadline']}\n"
+                f"Manager's Goal: {inputs['managers_goal']}\n"
+                f"Example Goals: {snapshot.examples(inputs['department'], query)}"
+                for number, (inputs, query) in enumerate(zip(requests, queries), 1)
+            )
+            return snapshot.shared_section(queries), employees
+
+    def _cache_key(self, job_title, department, goal_description, key_results, deadline, managers_goal):
+        return self.cache.make_key(
+            self.prompt_store.current().digest,
+            self.template_digest,
+            *(normalize_text(value) for value in (job_title, department, goal_description, key_results, deadline, managers_goal))
         )
 
+    def _audit(self, kind, inputs_hash, outputs, started, source):
+        """Queue a record of one generation for the audit log; never blocks the caller."""
+        self.audit_log.record({
+            "kind": kind,
+            "endpoint": current_endpoint(),
+            "inputs_hash": inputs_hash,
+            "outputs": outputs,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "model": self.model_name,
+            "source": source,
+            "fallback": source == "fallback"
+        })
+
+    def _cached(self, kind, cache_key, started):
+        """Return the cached result for `cache_key` and audit the hit, or None on a miss."""
+        result = self.cache.get(cache_key)
+        if result is None:
+            outcome = "miss"
+        else:
+            print(f"Serving {kind} result from cache")
+            self._audit(kind, cache_key, result, started, "cache")
+            outcome = "hit"
+        metrics.inc("goal_portal_goal_cache_total", endpoint=current_endpoint(), kind=kind, result=outcome)
+        return result
+
+    def _store(self, kind, cache_key, goals, started):
+        # Fallback goals are never cached, only real LLM output
+        self.cache.set(cache_key, goals)
+        self._audit(kind, cache_key, goals, started, "llm")
+
+    def _fallback(self, kind, cache_key, error, started, job_title, department, goal_description, key_results, deadline):
+        print(f"Returning fallback goals: {error}")
+        self._count_fallback(error)
+        goals = self._fallback_goals(job_title, department, goal_description, key_results, deadline)
+        self._audit(kind, cache_key, goals, started, "fallback")
+        return goals
+
     def generate_smart_goals(self, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries=3):
+        started = time.monotonic()
+        cache_key = self._cache_key(job_title, department, goal_description, key_results, deadline, managers_goal)
+        cached_goals = self._cached("generate", cache_key, started)
+        if cached_goals is not None:
+            return cached_goals
+
+        # Identical requests already in flight, in this worker or another, share one LLM call
+        return self.single_flight.do(cache_key, lambda: self._generate_uncached(
+            cache_key, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries
+        ))
+
+    def _parse_goals(self, output):
+        print("LLM output:", output)
+        llm_text = self._output_text(output)
+
+
+        # The output of the LLM should be a JSON array
+        '''
+            [
+            {'title': 'tit...',
+             'description': 'des..',
+              'kpi': 'Incr...',
+              'companyTopBetAlignment': 'TRANSF...',
+              'framework3E': 'EXPA..',
+                'coreValue': 'Si...s.'}, 
+
+            {'title': 'Impl..n', 
+            'description': 'Int...', 
+      .....
+            ]
+        '''
+
+
+
+
+        # Every goal is checked for the six required fields
+        return IncrementalGoalParser.parse(llm_text)
+
+    def _generate_uncached(self, cache_key, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries):
+        started = time.monotonic()
         context = self.build_context(job_title, department, goal_description, key_results, deadline, managers_goal)
-        prompt = PromptTemplate(input_variables=["context"], template=self.template)
-        chain = prompt | self.llm
-        for attempt in range(max_retries):
+
+        try:
+            goals = self._invoke_with_retries(self.chain, {"context": context}, self._parse_goals, max_retries)
+        except Exception as e:
+            return self._fallback("generate", cache_key, e, started, job_title, department, goal_description, key_results, deadline)
+        self._store("generate", cache_key, goals, started)
+        return goals
+
+    async def agenerate_smart_goals(self, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries=3):
+        """
+        Async form of generate_smart_goals for the ASGI app: the LLM call and
+        retry backoff are awaited, so a slow generation does not hold a thread.
+        The SQLite cache, breaker and single-flight lookups run in a thread.
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(job_title, department, goal_description, key_results, deadline, managers_goal)
+        cached_goals = await asyncio.to_thread(self._cached, "generate", cache_key, started)
+        if cached_goals is not None:
+            return cached_goals
+
+        async def run():
+            context = self.build_context(job_title, department, goal_description, key_results, deadline, managers_goal)
             try:
-                output = chain.invoke({"context": context})
-                print("LLM output:", output)
-                llm_text = output['text'] if isinstance(output, dict) else output
-                llm_text = self._clean_llm_output(llm_text)
+                goals = await self._ainvoke_with_retries(self.chain, {"context": context}, self._parse_goals, max_retries)
+            except Exception as e:
+                return self._fallback("generate", cache_key, e, started, job_title, department, goal_description, key_results, deadline)
+            await asyncio.to_thread(self._store, "generate", cache_key, goals, started)
+            return goals
 
+        return await self.single_flight.ado(cache_key, run)
 
-                # The output of the LLM should be a JSON array
-                '''
-                    [
-                    {'title': 'tit...',
-                     'description': 'des..',
-                      'kpi': 'Incr...',
-                      'companyTopBetAlignment': 'TRANSF...',
-                      'framework3E': 'EXPA..',
-                        'coreValue': 'Si...s.'}, 
+    def generate_smart_goals_batch(self, requests, max_retries=3, batch_size=None):
+        """
+        Generate goals for several employees, up to `batch_size` of them per LLM call.
+
+        `requests` is a list of generate_smart_goals keyword-argument dicts; the
+        result is the list of their goal lists, in the same order. Cached entries
+        are served from the cache and identical requests are generated once.
+        Each call returns a JSON object keyed by employee ID that is validated
+        per employee, and only the employees whose goals were missing or invalid
+        are sent again, for up to `max_retries` rounds. Any still left go through
+        generate_smart_goals one at a time, with its fallback.
+        """
+        batch_size = batch_size or Config.LLM_BATCH_SIZE
+        started = time.monotonic()
+        keys = [self._cache_key(**inputs) for inputs in requests]
+        goals_by_key = {}
+        pending = []
+        seen = set()
+        for index, key in enumerate(keys):
+            if key in seen:
+                continue
+            seen.add(key)
+            cached_goals = self._cached("batch", key, started)
+            if cached_goals is not None:
+                goals_by_key[key] = cached_goals
+            else:
+                pending.append(index)
+
+        for _ in range(max_retries):
+            if not pending:
+                break
+            failed = []
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                goals = self._generate_batch([requests[index] for index in chunk])
+                for index, entry in zip(chunk, goals):
+                    if entry is None:
+                        failed.append(index)
+                    else:
+                        goals_by_key[keys[index]] = entry
+            pending = failed
 
-                    {'title': 'Impl..n', 
-                    'description': 'Int...', 
-              .....
-                    ]
-                '''
+        for index in pending:
+            goals_by_key[keys[index]] = self.generate_smart_goals(**requests[index], max_retries=max_retries)
+        return [goals_by_key[key] for key in keys]
 
+    def _generate_batch(self, requests):
+        """
+        Make one batched LLM call for `requests` and cache each valid entry.
+        Returns each request's goals, or None for those that failed validation.
+        """
+        started = time.monotonic()
+        employee_ids = [f"E{number}" for number in range(1, len(requests) + 1)]
+        context, employees = self.build_batch_context(requests)
 
+        def parse_batch(output):
+            print("LLM batch output:", output)
+            # Entries are validated one by one below, so one bad entry does not fail the batch
+            entries = IncrementalGoalParser.parse(self._output_text(output), required_fields=(), opening="{")[0]
+            if not isinstance(entries, dict):
+                raise GoalParseError("Expected a JSON object keyed by employee ID")
+            return entries
 
+        try:
+            entries = self._invoke_with_retries(self.batch_chain, {
+                "context": context,
+                "employees": employees,
+                "employee_ids": ", ".join(employee_ids)
+            }, parse_batch, 1)
+        except Exception as e:
+            print(f"Batch of {len(requests)} failed: {e}")
+            return [None] * len(requests)
 
-                return json.loads(llm_text)
+        results = []
+        for employee_id, inputs in zip(employee_ids, requests):
+            try:
+                goals = validate_goals(entries.get(employee_id))
+            except GoalParseError as e:
+                print(f"Batch entry {employee_id} is invalid: {e}")
+                results.append(None)
+                continue
+            self._store("batch", self._cache_key(**inputs), goals, started)
+            results.append(goals)
+        return results
+
+    def _invoke_with_retries(self, chain, inputs, parse, max_retries):
+        """
+        Invoke `chain` and return `parse(output)`, retrying failed attempts.
+
+        Raises CircuitOpenError without calling the LLM when the breaker is
+        open, or the last error once _Attempts allows no further retry.
+        """
+        attempts = _Attempts(self.breaker, max_retries)
+        while attempts.begin():
+            try:
+                with metrics.timer("llm_invoke"):
+                    output = chain.invoke(inputs)
+            except Exception as e:
+                delay = attempts.failed(e)
+            else:
+                attempts.succeeded()
+                try:
+                    with metrics.timer("parse"):
+                        return parse(output)
+                except Exception as e:
+                    delay = attempts.failed(e, llm_error=False)
+            if delay is None:
+                break
+            time.sleep(delay)
+        raise attempts.last_error
+
+    async def _ainvoke_with_retries(self, chain, inputs, parse, max_retries):
+        """Async form of _invoke_with_retries, awaiting `chain.ainvoke` and the backoff."""
+        attempts = _Attempts(self.breaker, max_retries)
+        while await asyncio.to_thread(attempts.begin):
+            try:
+                with metrics.timer("llm_invoke"):
+                    output = await chain.ainvoke(inputs)
+            except Exception as e:
+                delay = await asyncio.to_thread(attempts.failed, e)
+            else:
+                await asyncio.to_thread(attempts.succeeded)
+                try:
+                    with metrics.timer("parse"):
+                        return parse(output)
+                except Exception as e:
+                    # Unparseable output is not a breaker failure, so nothing is written here
+                    delay = attempts.failed(e, llm_error=False)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        raise attempts.last_error
+
+    @staticmethod
+    def _count_fallback(error=None):
+        if isinstance(error, CircuitOpenError) or error is None:
+            reason = "circuit_open"
+        elif isinstance(error, (GoalParseError, ValueError)):
+            reason = "invalid_output"
+        else:
+            reason = "llm_error"
+        metrics.inc("goal_portal_llm_fallback_total", endpoint=current_endpoint(), reason=reason)
+
+
+    def stream_smart_goals(self, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries=3):
+        """
+        Generate SMART goals through the LLM's streaming interface.
+
+        Yields (goal, is_fallback) tuples, each goal as soon as its JSON object is
+        complete in the stream. A failed attempt is only retried while nothing has
+        been yielded yet; after that the error is raised to the caller.
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(job_title, department, goal_description, key_results, deadline, managers_goal)
+        cached_goals = self._cached("stream", cache_key, started)
+        if cached_goals is not None:
+            for goal in cached_goals:
+                yield goal, False
+            return
+
+        context = self.build_context(job_title, department, goal_description, key_results, deadline, managers_goal)
+        attempts = _Attempts(self.breaker, max_retries)
+        while attempts.begin():
+            goals = []
+            try:
+                for goal in self._iter_streamed_goals(self.chain.stream({"context": context})):
+                    goals.append(goal)
+                    yield goal, False
+            except Exception as e:
+                delay = self._stream_failed(attempts, e)
+                if goals:
+                    raise
+                if delay is None:
+                    break
+                time.sleep(delay)
+            else:
+                self._stream_succeeded(attempts, cache_key, goals, started)
+                return
+
+        for goal in self._fallback("stream", cache_key, attempts.last_error, started, job_title, department, goal_description, key_results, deadline):
+            yield goal, True
+
+    async def astream_smart_goals(self, job_title, department, goal_description, key_results, deadline, managers_goal, max_retries=3):
+        """Async form of stream_smart_goals, reading the LLM through `chain.astream`."""
+        started = time.monotonic()
+        cache_key = self._cache_key(job_title, department, goal_description, key_results, deadline, managers_goal)
+        cached_goals = await asyncio.to_thread(self._cached, "stream", cache_key, started)
+        if cached_goals is not None:
+            for goal in cached_goals:
+                yield goal, False
+            return
+
+        context = self.build_context(job_title, department, goal_description, key_results, deadline, managers_goal)
+        attempts = _Attempts(self.breaker, max_retries)
+        while await asyncio.to_thread(attempts.begin):
+            goals = []
+            try:
+                parser = IncrementalGoalParser()
+                async for chunk in self.chain.astream({"context": context}):
+                    for goal in parser.feed(self._output_text(chunk)):
+                        goals.append(goal)
+                        yield goal, False
+                parser.close()
             except Exception as e:
-                if attempt == max_retries - 1:
-                    return self._fallback_goals(job_title, department, goal_description, key_results, deadline)
-                time.sleep(2 ** attempt)
+                delay = await asyncio.to_thread(self._stream_failed, attempts, e)
+                if goals:
+                    raise
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.to_thread(self._stream_succeeded, attempts, cache_key, goals, started)
+                return
 
+        for goal in self._fallback("stream", cache_key, attempts.last_error, started, job_title, department, goal_description, key_results, deadline):
+            yield goal, True
+
+    def _stream_succeeded(self, attempts, cache_key, goals, started):
+        attempts.succeeded()
+        metrics.observe("goal_portal_stage_duration_seconds", time.monotonic() - attempts.started,
+                        stage="llm_stream", endpoint=current_endpoint(), outcome="ok")
+        self._store("stream", cache_key, goals, started)
+
+    @staticmethod
+    def _stream_failed(attempts, error):
+        """Record a failed streaming attempt and return the backoff before the next one, or None."""
+        metrics.observe("goal_portal_stage_duration_seconds", time.monotonic() - attempts.started,
+                        stage="llm_stream", endpoint=current_endpoint(), outcome="error")
+        # Unparseable output is not an LLM outage
+        return attempts.failed(error, llm_error=not isinstance(error, GoalParseError))
+
+    def _iter_streamed_goals(self, chunks):
+        """Yield each validated goal from a stream of LLM chunks as soon as its closing brace arrives."""
+        parser = IncrementalGoalParser()
+        for chunk in chunks:
+            yield from parser.feed(self._output_text(chunk))
+        parser.close()
 
     def _update_user_goal(self, goal, comment, max_retries=3):
         """
@@ -114,96 +554,98 @@ class SMARTGoalsGenerator:
             dict: Updated goal with same structure as input
         """
         
-        # Create the update template
-        update_template = (
-            "You are tasked with updating a SMART goal based on user feedback.\n\n"
-            "Original Goal:\n"
-            "Title: {original_title}\n"
-            "Description: {original_description}\n"
-            "KPI: {original_kpi}\n"
-            "Company Top Bet Alignment: {original_alignment}\n"
-            "3E Framework: {original_framework}\n"
-            "Core Value: {original_core_value}\n\n"
-            "User's Update Request: {user_comment}\n\n"
-            "Core Values Available: {core_values}\n"
-            "3E Strategic Framework Options: {framework_3e}\n"
-            "Company Top Bets: {company_top_bets}\n\n"
-            "Instructions:\n"
-            "1. Update the goal based on the user's feedback while maintaining SMART criteria\n"
-            "2. Keep the goal specific, measurable, achievable, relevant, and time-bound\n"
-            "3. Ensure alignment with appropriate company values, framework, and top bets\n"
-            "4. For the KPI field, include both the metric and the 5-point scoring system:\n"
-            "   - 5 points: Significantly exceed the goal or achieve it much faster than planned\n"
-            "   - 4 points: Exceed the goal\n"
-            "   - 3 points: Fully achieve the goal as planned\n"
-            "   - 2 points: Partially achieve the goal\n"
-            "   - 1 point: Underperform or do not achieve the goal\n\n"
-            "Return ONLY a valid JSON object with the updated goal containing these exact fields:\n"
-            "title, description, kpi, companyTopBetAlignment, framework3E, coreValue"
-        )
-        
-        # Prepare the context data
-        core_values = self.prompts_data.get("core_values", [])
-        framework_3e = self.prompts_data.get("framework_3e", [])
-        company_top_bets = self.prompts_data.get("company_top_bets", [])
-        
-        # Create the prompt
-        prompt = PromptTemplate(
-            input_variables=[
-                "original_title", "original_description", "original_kpi", 
-                "original_alignment", "original_framework", "original_core_value",
-                "user_comment", "core_values", "framework_3e", "company_top_bets"
-            ],
-            template=update_template
-        )
-        
-        # Create the chain
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        
-        # Attempt to update the goal with retries
-        for attempt in range(max_retries):
-            try:
-                # Invoke the LLM
-                output = chain.invoke({
-                    "original_title": goal.get("title", ""),
-                    "original_description": goal.get("description", ""),
-                    "original_kpi": goal.get("kpi", ""),
-                    "original_alignment": goal.get("companyTopBetAlignment", ""),
-                    "original_framework": goal.get("framework3E", ""),
-                    "original_core_value": goal.get("coreValue", ""),
-                    "user_comment": comment,
-                    "core_values": core_values,
-                    "framework_3e": framework_3e,
-                    "company_top_bets": company_top_bets
-                })
-                
-                print("LLM update output:", output)
-                
-                # Extract the text from the output
-                llm_text = output['text'] if isinstance(output, dict) else output
-                llm_text = self._clean_llm_output(llm_text)
-                
-                # Parse the JSON response
-                updated_goal = json.loads(llm_text)
-                
-                # Validate that all required fields are present
-                required_fields = ['title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue']
-                if all(field in updated_goal for field in required_fields):
-                    print(f"Goal successfully updated: {updated_goal['title']}")
-                    return updated_goal
-                else:
-                    raise ValueError("Missing required fields in updated goal")
-                    
-            except Exception as e:
-                print(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    # If all retries failed, return a minimally updated version
-                    print("All update attempts failed, returning goal with minor modification")
-                    return self._fallback_update(goal, comment)
-                time.sleep(2 ** attempt)  # Exponential backoff
-        
-        # This should never be reached, but just in case
-        return self._fallback_update(goal, comment)
+        snapshot = self.prompt_store.current()
+        started = time.monotonic()
+        cache_key = self._update_cache_key(snapshot, goal, comment)
+        changes = self._cached("update", cache_key, started)
+        if changes is not None:
+            return dict(goal, **changes)
+
+        def run():
+            changes = self._invoke_with_retries(self.update_chain, self._update_inputs(snapshot, goal, comment),
+                                                lambda output: self._parse_update(snapshot, goal, output), max_retries)
+            self.cache.set(cache_key, changes)
+            return changes
+
+        try:
+            changes = self.single_flight.do(cache_key, run)
+        except Exception as e:
+            return self._fallback_update_for(cache_key, goal, comment, e, started)
+        return self._apply_update(cache_key, goal, changes, started)
+
+    async def _aupdate_user_goal(self, goal, comment, max_retries=3):
+        """Async form of _update_user_goal, awaiting the LLM call."""
+        snapshot = self.prompt_store.current()
+        started = time.monotonic()
+        cache_key = self._update_cache_key(snapshot, goal, comment)
+        changes = await asyncio.to_thread(self._cached, "update", cache_key, started)
+        if changes is not None:
+            return dict(goal, **changes)
+
+        async def run():
+            changes = await self._ainvoke_with_retries(self.update_chain, self._update_inputs(snapshot, goal, comment),
+                                                       lambda output: self._parse_update(snapshot, goal, output), max_retries)
+            await asyncio.to_thread(self.cache.set, cache_key, changes)
+            return changes
+
+        try:
+            changes = await self.single_flight.ado(cache_key, run)
+        except Exception as e:
+            return self._fallback_update_for(cache_key, goal, comment, e, started)
+        return self._apply_update(cache_key, goal, changes, started)
+
+    def _apply_update(self, cache_key, goal, changes, started):
+        print(f"Goal successfully updated: {', '.join(changes) or 'no changes'}")
+        self._audit("update", cache_key, changes, started, "llm")
+        return dict(goal, **changes)
+
+    def _fallback_update_for(self, cache_key, goal, comment, error, started):
+        # If all retries failed, return a minimally updated version
+        print(f"All update attempts failed, returning goal with minor modification: {error}")
+        self._count_fallback(error)
+        updated_goal = self._fallback_update(goal, comment)
+        self._audit("update", cache_key, updated_goal, started, "fallback")
+        return updated_goal
+
+    def _update_cache_key(self, snapshot, goal, comment):
+        # The same comment on the same revision of a goal always gives the same edit
+        revision = self.cache.make_key(*(goal.get(field, "") for field in REQUIRED_GOAL_FIELDS))
+        return self.cache.make_key("update", snapshot.digest, self.template_digest, revision, normalize_text(comment))
+
+    @staticmethod
+    def _update_inputs(snapshot, goal, comment):
+        return {
+            "original_title": goal.get("title", ""),
+            "original_description": goal.get("description", ""),
+            "original_kpi": goal.get("kpi", ""),
+            "original_alignment": goal.get("companyTopBetAlignment", ""),
+            "original_framework": goal.get("framework3E", ""),
+            "original_core_value": goal.get("coreValue", ""),
+            "user_comment": comment,
+            "core_values": snapshot.core_value_ids_text,
+            "framework_3e": snapshot.framework_3e_ids_text,
+            "company_top_bets": snapshot.top_bet_ids_text
+        }
+
+    def _parse_update(self, snapshot, goal, output):
+        print("LLM update output:", output)
+        # Only the fields that changed come back; reference IDs are expanded to the full entries
+        diff = IncrementalGoalParser.parse(self._output_text(output), required_fields=(), opening="{")[0]
+        changes = {}
+        for field in REQUIRED_GOAL_FIELDS:
+            value = diff.get(field)
+            if not isinstance(value, str) or not value.strip():
+                continue
+            prefix = REFERENCE_FIELDS.get(field)
+            if prefix:
+                # The goal holds free text, the model answers with an ID: compare the entries they name
+                reference_id = snapshot.reference_id(value, prefix)
+                if reference_id is not None and reference_id == snapshot.reference_id(goal.get(field), prefix):
+                    continue
+                value = snapshot.resolve_reference(value)
+            if normalize_text(value) != normalize_text(goal.get(field)):
+                changes[field] = value.strip()
+        return changes
 
     def _fallback_update(self, goal, comment):
         """
@@ -224,19 +666,12 @@ class SMARTGoalsGenerator:
         return updated_goal
 
 
-    def _clean_llm_output(self, llm_text):
-        """
-        Extract JSON array from LLM output, even if wrapped in markdown code block.
-        """
-        # Remove markdown code block if present
-        match = re.search(r"```(?:json)?\s*([\s\S]+?)\s*```", llm_text)
-        if match:
-            llm_text = match.group(1)
-        # Remove any leading/trailing whitespace
-        llm_text = llm_text.strip()
-        # Optionally, remove trailing commas (for safety)
-        llm_text = re.sub(r",\s*([\]}])", r"\1", llm_text)
-        return llm_text
+    @staticmethod
+    def _output_text(output):
+        """Return the text of an LLM result, whether a string, dict or chat message."""
+        if isinstance(output, dict):
+            return output.get('text', '')
+        return getattr(output, 'content', output)
 
     def _fallback_goals(self, job_title, department, goal_description, key_results, deadline):
         return [
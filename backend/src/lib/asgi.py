@@ -0,0 +1,221 @@
+# lib/asgi.py
+
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import request
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+from . import create_app, warm_up
+from .api.async_routes import async_views
+from .config import Config
+
+
+class AsgiApp:
+    """
+    ASGI front end for the Flask app, for running under uvicorn.
+
+    Requests for an endpoint with an async view in `async_views` (the LLM
+    routes) run on the event loop, inside a Flask request context: before and
+    after request hooks (auth, CORS, metrics), `g` and `request` behave as
+    under WSGI, and the LLM call is awaited, so one process can hold hundreds
+    of generations open at once. The SQLite cache, breaker and rate limit
+    calls on that path run in a thread, since they can wait on another
+    worker's lock. A streamed body is closed as soon as the client
+    disconnects, which stops the LLM call feeding it.
+
+    Every other request runs the unchanged WSGI app on a pool of
+    `wsgi_threads` threads, each request start to finish on one thread so
+    stream_with_context responses work. (asgiref's WsgiToAsgi would run all of
+    them on a single shared thread.)
+    """
+
+    def __init__(self, flask_app, wsgi_threads=None):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads or Config.ASGI_WSGI_THREADS, thread_name_prefix="wsgi")
+        # Under WSGI ProxyFix wraps app.wsgi_app; async views bypass it, so it is applied to their environ here
+        self.proxy_fix = None
+        if Config.TRUSTED_PROXIES:
+            self.proxy_fix = ProxyFix(lambda environ, start_response: environ,
+                                      x_for=Config.TRUSTED_PROXIES, x_proto=Config.TRUSTED_PROXIES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self._read_body(receive)
+        try:
+            environ = self._environ(scope, body)
+            view = self._async_view(environ)
+            if view:
+                await self._run_async_view(view, environ, receive, send)
+            else:
+                await self._run_wsgi(environ, send)
+        finally:
+            body.close()
+
+    @staticmethod
+    def _environ(scope, body):
+        """Translate an ASGI HTTP scope and its request body into a WSGI environ."""
+        script_name = scope.get("root_path", "")
+        path_info = scope["path"]
+        if script_name and path_info.startswith(script_name):
+            path_info = path_info[len(script_name):]
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": script_name.encode("utf-8").decode("latin-1"),
+            "PATH_INFO": path_info.encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1] or 80),
+            "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def _async_view(self, environ):
+        # CORS preflights and unknown routes are left to Flask
+        if environ["REQUEST_METHOD"] == "OPTIONS":
+            return None
+        try:
+            endpoint, _ = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None
+        return async_views.get(endpoint)
+
+    async def _run_async_view(self, view, environ, receive, send):
+        app = self.flask_app
+        if self.proxy_fix:
+            environ = self.proxy_fix(environ, None)
+        # Same steps as Flask.full_dispatch_request, with the view awaited
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+            # The request context stays pushed while a streamed body is produced
+            await self._send_response(response, receive, send)
+
+    async def _send_response(self, response, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()]
+        })
+        body = response.response
+        if hasattr(body, "__aiter__"):
+            # Stop producing the body (and the LLM stream behind it) if the client goes away
+            sender = asyncio.ensure_future(self._send_async_body(body, send))
+            watcher = asyncio.ensure_future(self._wait_for_disconnect(receive))
+            try:
+                await asyncio.wait({sender, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                if not sender.done():
+                    sender.cancel()
+                    await asyncio.gather(sender, return_exceptions=True)
+                    return
+                sender.result()
+            finally:
+                watcher.cancel()
+                if hasattr(body, "aclose"):
+                    await body.aclose()
+        else:
+            for chunk in response.iter_encoded():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _send_async_body(body, send):
+        async for chunk in body:
+            await send({"type": "http.response.body", "body": chunk.encode() if isinstance(chunk, str) else chunk, "more_body": True})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        # The request body has been read already, so the next message is the disconnect
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _run_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+
+        def sync_send(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started["status"] = int(status.split(" ", 1)[0])
+                started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+            def send_start():
+                if started and not started.get("sent"):
+                    sync_send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+                    started["sent"] = True
+
+            result = self.flask_app(environ, start_response)
+            try:
+                for chunk in result:
+                    send_start()
+                    if chunk:
+                        sync_send({"type": "http.response.body", "body": chunk, "more_body": True})
+                send_start()
+                sync_send({"type": "http.response.body", "body": b""})
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+
+        await loop.run_in_executor(self.executor, run)
+
+    @staticmethod
+    async def _read_body(receive):
+        # Large uploads (bulk rosters) spill to disk
+        body = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        return body
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Each uvicorn worker opens its own DB pool and LLM client
+                warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app():
+    return AsgiApp(create_app())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # ✅ Load environment variables from .env
@@ -14,6 +15,116 @@ class Config:
     DBNAME=os.getenv("dbname")
     BASE_URL = os.getenv("API_BASE_URL")
     # DEBUG = ENV == "development"
-    
 
-    
\ No newline at end of file
+    # Directory for the SQLite files shared by all gunicorn workers on a host
+    LOCAL_STATE_DIR = os.getenv("LOCAL_STATE_DIR", os.path.join(tempfile.gettempdir(), "hr-goal-portal"))
+
+    # Generated goals cache
+    GOAL_CACHE_TTL = int(os.getenv("GOAL_CACHE_TTL", "86400"))
+    GOAL_CACHE_MAX_ENTRIES = int(os.getenv("GOAL_CACHE_MAX_ENTRIES", "5000"))
+
+    # How many example goals and company top bets go into each prompt
+    PROMPT_TOP_EXAMPLES = int(os.getenv("PROMPT_TOP_EXAMPLES", "3"))
+    PROMPT_TOP_BETS = int(os.getenv("PROMPT_TOP_BETS", "4"))
+
+    # Employee profiles cached after login. The employees and managers tables are
+    # maintained outside the app, so an edit shows up once its entry expires
+    PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "900"))
+
+    # Background job queue
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+    JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+    # Bulk roster generation
+    BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", "4"))
+    # Bulk runs have their own token bucket per caller, one token per employee, so a
+    # roster never drains the budget of the interactive endpoints. A batch that
+    # cannot get its tokens within BULK_RATE_LIMIT_MAX_WAIT seconds fails its rows.
+    BULK_RATE_LIMIT_RATE = float(os.getenv("BULK_RATE_LIMIT_RATE", "1"))
+    BULK_RATE_LIMIT_BURST = int(os.getenv("BULK_RATE_LIMIT_BURST", "50"))
+    BULK_RATE_LIMIT_MAX_WAIT = float(os.getenv("BULK_RATE_LIMIT_MAX_WAIT", "60"))
+
+    # PostgreSQL connection pool
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))
+
+    # Goal write-behind buffer
+    GOAL_FLUSH_SIZE = int(os.getenv("GOAL_FLUSH_SIZE", "50"))
+    GOAL_FLUSH_INTERVAL = float(os.getenv("GOAL_FLUSH_INTERVAL", "2"))
+    GOAL_BUFFER_MAX = int(os.getenv("GOAL_BUFFER_MAX", "10000"))
+    GOAL_WRITE_MAX_ATTEMPTS = int(os.getenv("GOAL_WRITE_MAX_ATTEMPTS", "3"))
+    GOAL_DURABLE_TIMEOUT = float(os.getenv("GOAL_DURABLE_TIMEOUT", "10"))
+
+    # bcrypt process pool
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "2"))
+    HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", "16"))
+    HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+
+    # LLM backend: "gemini", or "stub" for a local fake with configurable latency, failures and fixtures
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0.5"))
+    LLM_STUB_LATENCY_JITTER = float(os.getenv("LLM_STUB_LATENCY_JITTER", "0.2"))
+    LLM_STUB_FAILURE_RATE = float(os.getenv("LLM_STUB_FAILURE_RATE", "0"))
+    LLM_STUB_MALFORMED_RATE = float(os.getenv("LLM_STUB_MALFORMED_RATE", "0"))
+    LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", "0"))
+    LLM_STUB_FIXTURES = os.getenv("LLM_STUB_FIXTURES", "")
+
+    # Output token limits, and how many employees bulk and pre-generation pack into one LLM call
+    LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "2000"))
+    LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+    LLM_BATCH_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_BATCH_MAX_OUTPUT_TOKENS", "8192"))
+
+    # Gemini calls: per-call timeout, total retry budget and circuit breaker
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    LLM_RETRY_BUDGET = float(os.getenv("LLM_RETRY_BUDGET", "10"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "4"))
+    BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "60"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "60"))
+    BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+    # Per-client token bucket on the LLM-backed endpoints (tokens per second, bucket size, max queueing wait)
+    RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "0.2"))
+    RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))
+    # Number of reverse proxies in front of the app whose X-Forwarded-For can be trusted.
+    # Railway's edge proxy is one hop; railway.json and the Procfile set 1 there
+    TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "0"))
+
+    # Under the ASGI app (src/asgi.py), threads per process for the routes that still run as WSGI
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+    # How often each worker writes its metrics to the shared store, and the optional bearer token for /api/metrics
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Append-only JSONL audit log of goal generations, written in the background
+    AUDIT_LOG_PATH = os.getenv("AUDIT_LOG_PATH", os.path.join("logs", "smart_goals_audit.jsonl"))
+    AUDIT_LOG_MAX_BYTES = int(os.getenv("AUDIT_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    AUDIT_LOG_BACKUPS = int(os.getenv("AUDIT_LOG_BACKUPS", "5"))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+
+    # Similar goal search: default and maximum number of results, and the query time limit
+    SIMILAR_GOALS_LIMIT = int(os.getenv("SIMILAR_GOALS_LIMIT", "5"))
+    SIMILAR_GOALS_MAX_LIMIT = int(os.getenv("SIMILAR_GOALS_MAX_LIMIT", "20"))
+    SIMILAR_GOALS_TIMEOUT_MS = int(os.getenv("SIMILAR_GOALS_TIMEOUT_MS", "500"))
+    # Best-ranked matches considered per requested goal before duplicate titles are dropped
+    SIMILAR_GOALS_CANDIDATES = int(os.getenv("SIMILAR_GOALS_CANDIDATES", "4"))
+
+    # Goal export: rows per server-side cursor fetch, and exports each worker runs at once (each holds a DB connection)
+    EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+    EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+    # Org-wide data (the goals export) is limited to these: comma-separated admin
+    # emails, and employees of the HR departments
+    ADMIN_EMAILS = [email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()]
+    HR_DEPARTMENTS = [name.strip().lower() for name in os.getenv("HR_DEPARTMENTS", "HR,Human Resources").split(",") if name.strip()]
+
+    # Seconds a worker may hold the lease on an in-flight generation before others take over
+    SINGLE_FLIGHT_LEASE = float(os.getenv("SINGLE_FLIGHT_LEASE", "150"))
@@ -1,10 +1,8 @@
-import os
-from dotenv import load_dotenv
 import psycopg2
 from src.lib.config import Config
 
 def make_db_connection():
-    """Fetch user credentials from environment variables."""
+    """Open a new connection using the credentials from the environment. Raises on failure."""
 
     USER = Config.USER
     PASSWORD = Config.PASSWORD
@@ -20,7 +18,8 @@ def make_db_connection():
                 password=PASSWORD,
                 host=HOST,
                 port=PORT,
-                dbname=DBNAME
+                dbname=DBNAME,
+                connect_timeout=10
             )
             print("Connection successful to the Database!")
             return connection
@@ -28,7 +27,4 @@ def make_db_connection():
 
     except Exception as e:
             print(f"Connection failed to Database: {str(e)}")
-            exit(1)
-
-
-
+            raise
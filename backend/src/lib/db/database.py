@@ -1,64 +1,239 @@
 import psycopg2
-import bcrypt
+import re
+from datetime import datetime
+from src.lib.config import Config
+from src.lib.db.db_connection import db_cursor, get_db_pool
+from src.lib.utils.metrics import metrics
+from src.lib.db.goal_writer import goal_buffer
+from src.lib.utils.cache import ResultCache
+from src.lib.utils.hashing import password_hasher
 
 
-def get_user(connection, email, password):
+PROFILE_COLUMNS = ['email', 'name', 'department', 'designation', 'manager_id', 'managers_goal']
+
+# One round trip for the employee, their password hash and their manager's goal
+USER_QUERY = """
+    SELECT e.email, e.name, e.department, e.designation, e.manager_id, m.goal, e.password
+    FROM employees e
+    LEFT JOIN managers m ON m.manager_id = e.manager_id
+    WHERE e.email = %s
+"""
+
+profile_cache = ResultCache(name="profile_cache", ttl=Config.PROFILE_CACHE_TTL)
+
+# The top `candidates` matches by rank (a bounded top-N sort), then the best
+# one per distinct title, so a goal saved by many employees shows up once.
+# Goals of the given department (compared case-insensitively, never as a
+# pattern) rank first, but other goals, including those saved without a
+# department, are still suggested.
+SIMILAR_GOALS_QUERY = """
+    SELECT id, title, description, kpi, company_top_bet_alignment, framework_3e, core_value, department, cycle, score
+    FROM (
+        SELECT DISTINCT ON (lower(title)) *
+        FROM (
+            SELECT id, title, description, kpi, company_top_bet_alignment, framework_3e, core_value, department, cycle,
+                   ts_rank_cd(search_vector, query) AS score,
+                   COALESCE(lower(department) = lower(%(department)s::text), false) AS same_department
+            FROM goals, to_tsquery('english', %(query)s) AS query
+            WHERE search_vector @@ query
+            ORDER BY same_department DESC, score DESC, id DESC
+            LIMIT %(candidates)s
+        ) top
+        ORDER BY lower(title), same_department DESC, score DESC, id DESC
+    ) best
+    ORDER BY same_department DESC, score DESC, id DESC
+    LIMIT %(limit)s
+"""
+
+# Saved goals in insertion order; the primary key order lets the cursor return its first rows without sorting.
+# The department is compared case-insensitively as plain text, so "%" or "_" in the filter match only themselves
+EXPORT_GOALS_QUERY = """
+    SELECT id, employee_email, department, manager_id, cycle, title, description, kpi,
+           company_top_bet_alignment, framework_3e, core_value, created_at
+    FROM goals
+    WHERE (%(department)s::text IS NULL OR lower(department) = lower(%(department)s::text))
+      AND (%(manager_id)s::text IS NULL OR manager_id = %(manager_id)s)
+      AND (%(cycle)s::text IS NULL OR cycle = %(cycle)s)
+    ORDER BY id
+"""
+
+
+def _profile_from_row(row):
+    profile = dict(zip(PROFILE_COLUMNS, row[:len(PROFILE_COLUMNS)]))
+    for column in ('name', 'department', 'designation'):
+        if profile[column] is None:
+            profile[column] = "Unknown"
+    if profile['managers_goal'] is None:
+        profile['managers_goal'] = "No goal assigned"
+    if profile['manager_id'] is not None:
+        profile['manager_id'] = str(profile['manager_id'])
+    return profile
+
+
+def _profile_key(email):
+    return profile_cache.make_key(email.strip().lower())
+
+
+def get_user(email, password):
+    """
+    Check an employee's password and return their profile, or None when the
+    email is unknown or the password is wrong. Database errors are raised.
+    """
+    with db_cursor() as cursor:
+        cursor.execute(USER_QUERY, (email,))
+        user = cursor.fetchone()
+    if not user:
+        return None
+
+    stored_hash = user[len(PROFILE_COLUMNS)]
+    if not stored_hash:
+        return None
+
+    # bcrypt runs in the shared process pool; HashPoolSaturated is raised to the caller
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM employees WHERE email = %s", (email,))
-            user = cursor.fetchone()
-            if not user:
-                return None
+        if not password_hasher.check_password(password, stored_hash):
+            return None
+    except ValueError as e:
+        print(f"Invalid password hash for {email}: {e}")
+        return None
 
-            column_names = [desc[0] for desc in cursor.description]
-            try:
-                stored_hash = user[column_names.index('password')]
-            except ValueError:
-                return None
-
-            if not stored_hash:
-                return None
-
-            # Ensure both password and hash are bytes
-            password_bytes = password.encode('utf-8')
-            stored_hash_bytes = stored_hash.encode('utf-8') if isinstance(stored_hash, str) else stored_hash
-
-            if not bcrypt.checkpw(password_bytes, stored_hash_bytes):
-                return None
-
-            # Gather user info
-            def get_value(col):
-                try:
-                    return user[column_names.index(col)]
-                except ValueError:
-                    return "Unknown"
-
-            # Get manager's goal if manager_id exists
-            manager_id = get_value('manager_id')
-            managers_goal = "No goal assigned"
-            if manager_id != "Unknown":
-                cursor.execute("SELECT goal FROM managers WHERE manager_id = %s", (manager_id,))
-                manager_goal_row = cursor.fetchone()
-                if manager_goal_row:
-                    managers_goal = manager_goal_row[0]
-
-            return {
-                'email': get_value('email'),
-                'name': get_value('name'),
-                'department': get_value('department'),
-                'designation': get_value('designation'),
-                'managers_goal': managers_goal
-            }
-    except Exception as e:
-        print(f"Error in get_user: {e}")
+    profile = _profile_from_row(user)
+    profile_cache.set(_profile_key(email), profile)
+    return profile
+
+
+def get_profile(email):
+    """Return an employee's profile without checking a password, served from the profile cache when possible."""
+    key = _profile_key(email)
+    profile = profile_cache.get(key)
+    if profile is not None:
+        return profile
+
+    with db_cursor() as cursor:
+        cursor.execute(USER_QUERY, (email,))
+        user = cursor.fetchone()
+    if not user:
         return None
 
+    profile = _profile_from_row(user)
+    profile_cache.set(key, profile)
+    return profile
+
+
+def find_similar_goals(text, department=None, limit=5):
+    """
+    Return saved goals whose title, description or kpi share words with
+    `text`, best matches first. Any word may match; ranking favours goals that
+    match more of them, and matches in the title over the description and kpi.
+    Goals from `department` come before those of other departments.
+    """
+    words = re.findall(r"[A-Za-z0-9]+", text or "")[:32]
+    if not words:
+        return []
 
+    with db_cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = %s", (Config.SIMILAR_GOALS_TIMEOUT_MS,))
+        cursor.execute(SIMILAR_GOALS_QUERY, {
+            'query': " | ".join(words),
+            'department': department or None,
+            'limit': limit,
+            # Headroom for duplicate titles among the best matches
+            'candidates': limit * Config.SIMILAR_GOALS_CANDIDATES
+        })
+        rows = cursor.fetchall()
 
-def save_goal(goal):
+    return [{
+        'id': row[0],
+        'title': row[1],
+        'description': row[2],
+        'kpi': row[3],
+        'companyTopBetAlignment': row[4],
+        'framework3E': row[5],
+        'coreValue': row[6],
+        'department': row[7],
+        'cycle': row[8],
+        'score': round(float(row[9]), 4)
+    } for row in rows]
+
+
+def iter_goals(department=None, manager_id=None, cycle=None, fetch_size=None):
+    """
+    Yield saved goals matching the filters, oldest first, read through a
+    server-side cursor `fetch_size` rows at a time so memory stays flat
+    however many goals there are. The pooled connection is held until the
+    generator is exhausted or closed.
+    """
+    pool = get_db_pool()
+    connection = pool.getconn()
+    broken = False
     try:
-        print("LOGIC OF SAVING GOAL TO DB HERE!!")
-        goal["title"] = "THIS GOAL HAS BEEN SAVED TO THE DB"
-        return goal
+        with metrics.timer("db_export"):
+            with connection.cursor(name="goal_export") as cursor:
+                cursor.itersize = fetch_size or Config.EXPORT_FETCH_SIZE
+                cursor.execute(EXPORT_GOALS_QUERY, {
+                    'department': department or None,
+                    'manager_id': manager_id or None,
+                    'cycle': cycle or None
+                })
+                for row in cursor:
+                    yield {
+                        'id': row[0],
+                        'employeeEmail': row[1],
+                        'department': row[2],
+                        'managerId': row[3],
+                        'cycle': row[4],
+                        'title': row[5],
+                        'description': row[6],
+                        'kpi': row[7],
+                        'companyTopBetAlignment': row[8],
+                        'framework3E': row[9],
+                        'coreValue': row[10],
+                        'createdAt': row[11].isoformat() if row[11] else None
+                    }
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        # Also reached when the client disconnects and the generator is closed early
+        pool.putconn(connection, discard=broken or connection.closed)
+
+
+def save_goal(goal, owner=None, durable=False):
+    """
+    Persist a goal to the goals table through the write-behind buffer.
+
+    `owner` carries the employee fields (email, department, manager_id, cycle).
+    With durable=True this waits until the goal's batch has been written and
+    returns it with its database id; otherwise it returns as soon as the goal
+    is queued.
+    """
+    owner = owner or {}
+    row = {
+        'employee_email': owner.get('email'),
+        'department': owner.get('department'),
+        'manager_id': owner.get('manager_id'),
+        'cycle': owner.get('cycle') or str(datetime.now().year),
+        'title': goal['title'],
+        'description': goal['description'],
+        'kpi': goal['kpi'],
+        'company_top_bet_alignment': goal.get('companyTopBetAlignment'),
+        'framework_3e': goal.get('framework3E'),
+        'core_value': goal.get('coreValue')
+    }
+    # Postgres text cannot hold NUL characters; one such row would fail its whole batch
+    row = {column: value.replace('\x00', '') if isinstance(value, str) else value for column, value in row.items()}
+    try:
+        pending = goal_buffer.add(row, durable=durable)
+        saved = dict(goal)
+        if durable:
+            try:
+                saved['id'] = pending.wait(Config.GOAL_DURABLE_TIMEOUT)
+            except TimeoutError:
+                # Take the goal back out of the buffer, so an error response never becomes a saved row
+                if goal_buffer.cancel(pending):
+                    raise TimeoutError("Timed out waiting for the database; the goal was not saved")
+                # Its INSERT is already running: report how that ends, so a retry cannot duplicate it
+                saved['id'] = pending.wait(Config.GOAL_DURABLE_TIMEOUT)
+        return saved
     except Exception as e:
         raise Exception(f"Error saving goal: {e}")
@@ -1,14 +1,192 @@
 # lib/db/db_connection.py
 
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+import psycopg2
+from psycopg2 import extensions
+from src.lib.config import Config
 from src.lib.db.connect_db import make_db_connection
+from src.lib.utils.metrics import metrics
 
-db_connection = None
 
-def init_db_connection():
-    global db_connection
-    if db_connection is None:
-        db_connection = make_db_connection()
-    return db_connection
+class PoolTimeoutError(Exception):
+    """Raised when no database connection could be checked out in time."""
 
-def get_db_connection():
-    return db_connection
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Keeps between `minconn` and `maxconn` connections open. A checkout waits up
+    to `timeout` seconds for a free connection. Connections that sat idle longer
+    than `ping_after` seconds are pinged before being handed out, and broken
+    connections are replaced with fresh ones, so a database restart does not
+    need an app restart. A pool inherited through fork drops its parent's
+    connections instead of sharing their sockets.
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=5.0, ping_after=30.0):
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._condition = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []  # (connection, returned_at)
+        self._size = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def fill(self):
+        """Open connections until the pool holds `minconn` of them."""
+        with self._condition:
+            self._check_fork()
+            while self._size < self.minconn:
+                self._idle.append((self._connect(), time.monotonic()))
+                self._size += 1
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._check_fork()
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    connection, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {timeout}s")
+                self._condition.wait(remaining)
+
+        try:
+            if connection is not None and not self._is_alive(connection, returned_at):
+                self._close(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def putconn(self, connection, discard=False):
+        with self._condition:
+            if self._pid != os.getpid():
+                return
+            if not discard and not connection.closed:
+                try:
+                    if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                        connection.rollback()
+                except Exception:
+                    discard = True
+            if discard or connection.closed:
+                self._close(connection)
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def closeall(self):
+        """Close the idle connections; a pool inherited through fork leaves its parent's alone."""
+        with self._condition:
+            self._check_fork()
+            for connection, _ in self._idle:
+                self._close(connection)
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def _is_alive(self, connection, returned_at):
+        if connection.closed:
+            return False
+        if time.monotonic() - returned_at < self.ping_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection, committing on success and rolling back on error."""
+        connection = self.getconn(timeout)
+        try:
+            yield connection
+            connection.commit()
+        except Exception as e:
+            broken = connection.closed or isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not connection.closed:
+                try:
+                    connection.rollback()
+                except Exception:
+                    broken = True
+            self.putconn(connection, discard=broken)
+            raise
+        else:
+            self.putconn(connection)
+
+
+db_pool = None
+_pool_lock = threading.Lock()
+
+def init_db_pool():
+    """Create the shared pool and open its minimum connections. A database that is down is not fatal."""
+    global db_pool
+    with _pool_lock:
+        if db_pool is None:
+            db_pool = ConnectionPool(
+                make_db_connection,
+                minconn=Config.DB_POOL_MIN,
+                maxconn=Config.DB_POOL_MAX,
+                timeout=Config.DB_POOL_TIMEOUT,
+                ping_after=Config.DB_POOL_PING_AFTER
+            )
+    try:
+        db_pool.fill()
+    except Exception as e:
+        print(f"Warning: database pool could not open its minimum connections: {e}")
+    return db_pool
+
+def get_db_pool():
+    return db_pool if db_pool is not None else init_db_pool()
+
+def close_db_pool():
+    """Close the pool's connections at exit, so the database sees a clean disconnect."""
+    if db_pool is not None:
+        db_pool.closeall()
+
+# Registered before the goal write buffer's flush (goal_writer imports this module), so it runs after it
+atexit.register(close_db_pool)
+
+@contextmanager
+def db_cursor(timeout=None):
+    """Check out a pooled connection and yield a cursor inside one transaction."""
+    with metrics.timer("db_query"):
+        with get_db_pool().connection(timeout) as connection:
+            with connection.cursor() as cursor:
+                yield cursor
@@ -0,0 +1,247 @@
+# lib/db/goal_writer.py
+
+import atexit
+import os
+import threading
+import time
+import psycopg2
+from psycopg2.extras import execute_values
+from src.lib.config import Config
+from src.lib.db.db_connection import db_cursor, PoolTimeoutError
+from src.lib.utils.audit import audit_log
+
+# Errors that say nothing about the rows themselves; the whole batch is kept for the next flush
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeoutError)
+
+GOALS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS goals (
+    id BIGSERIAL PRIMARY KEY,
+    employee_email TEXT,
+    department TEXT,
+    manager_id TEXT,
+    cycle TEXT,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    kpi TEXT NOT NULL,
+    company_top_bet_alignment TEXT,
+    framework_3e TEXT,
+    core_value TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+-- Full-text index over title, description and kpi for /api/goals/similar.
+-- Checked first so the ALTER's table lock is only taken once.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'goals' AND column_name = 'search_vector'
+    ) THEN
+        ALTER TABLE goals ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(kpi, '')), 'C')
+        ) STORED;
+        CREATE INDEX IF NOT EXISTS idx_goals_search_vector ON goals USING GIN (search_vector);
+    END IF;
+END
+$$;
+"""
+
+# Serialises create_goals_table across workers that start at the same time
+GOALS_SCHEMA_LOCK = 7303101
+
+_table_created = False
+
+
+def create_goals_table():
+    """
+    Create the goals table and its search index if they are missing. Run at
+    worker startup (see warm_up) and by `invoke migrate`, so request paths
+    never issue DDL.
+    """
+    global _table_created
+    with db_cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (GOALS_SCHEMA_LOCK,))
+        cursor.execute(GOALS_TABLE_SQL)
+    _table_created = True
+
+
+GOAL_COLUMNS = (
+    "employee_email", "department", "manager_id", "cycle", "title", "description",
+    "kpi", "company_top_bet_alignment", "framework_3e", "core_value"
+)
+
+
+class PendingGoal:
+    """A goal waiting in the buffer. `wait()` blocks until its batch is written."""
+
+    def __init__(self, row, durable=False):
+        self.row = row
+        self.durable = durable
+        self.id = None
+        self.error = None
+        self.attempts = 0
+        self.in_flight = False
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def resolve(self, goal_id=None, error=None):
+        self.id = goal_id
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Timed out waiting for the goal to be written")
+        if self.error:
+            raise self.error
+        return self.id
+
+
+class GoalWriteBuffer:
+    """
+    Write-behind buffer for the goals table.
+
+    Saved goals are queued in memory and written by a background thread with one
+    multi-row INSERT per batch, once `flush_size` goals are waiting or every
+    `flush_interval` seconds. A durable goal wakes the writer straight away and
+    its caller waits for the batch.
+
+    If the database is unavailable, durable callers get the error and the
+    other goals are kept for the next flush, up to `max_pending` goals. If a
+    batch is rejected for its data, it is split in halves until the bad rows
+    are isolated, so the good ones are still written. A row that fails on its
+    own `max_attempts` times (or once, if durable) is dropped and recorded in
+    the audit log. Anything still buffered is flushed when the process exits.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None, max_pending=None, max_attempts=None):
+        self.flush_size = flush_size or Config.GOAL_FLUSH_SIZE
+        self.flush_interval = flush_interval or Config.GOAL_FLUSH_INTERVAL
+        self.max_pending = max_pending or Config.GOAL_BUFFER_MAX
+        self.max_attempts = max_attempts or Config.GOAL_WRITE_MAX_ATTEMPTS
+        self._pending = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flush_now = False
+        self._started_pid = None
+
+    def add(self, row, durable=False):
+        """Queue a goal row and return its PendingGoal."""
+        pending = PendingGoal(row, durable)
+        with self._condition:
+            self._start()
+            if len(self._pending) >= self.max_pending:
+                raise RuntimeError("Goal write buffer is full")
+            self._pending.append(pending)
+            if durable or len(self._pending) >= self.flush_size:
+                self._flush_now = True
+                self._condition.notify()
+        return pending
+
+    def cancel(self, pending):
+        """Remove a goal whose write has not started; False if it is being written or already done."""
+        with self._condition:
+            if pending.in_flight or pending.done:
+                return False
+            try:
+                self._pending.remove(pending)
+            except ValueError:
+                return False
+            return True
+
+    def flush(self):
+        """Write everything currently buffered in one batch."""
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+                for pending in batch:
+                    pending.in_flight = True
+            if not batch:
+                return
+            retry = self._write_or_split(batch)
+            with self._condition:
+                for pending in retry:
+                    pending.in_flight = False
+                queued = retry + self._pending
+                if len(queued) > self.max_pending:
+                    print(f"Warning: goal write buffer full, dropping {len(queued) - self.max_pending} goals")
+                self._pending = queued[-self.max_pending:]
+
+    def _write_or_split(self, batch):
+        """Write `batch`, isolating rows the database rejects. Returns the goals to retry later."""
+        try:
+            self._write(batch)
+            return []
+        except TRANSIENT_ERRORS as e:
+            print(f"Database unavailable, keeping {len(batch)} goals for the next flush: {e}")
+            for pending in batch:
+                if pending.durable:
+                    pending.resolve(error=e)
+            return [pending for pending in batch if not pending.durable]
+        except Exception as e:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                return self._write_or_split(batch[:middle]) + self._write_or_split(batch[middle:])
+            pending = batch[0]
+            pending.attempts += 1
+            if pending.durable or pending.attempts >= self.max_attempts:
+                self._dead_letter(pending, e)
+                return []
+            return [pending]
+
+    @staticmethod
+    def _dead_letter(pending, error):
+        print(f"Dropping goal after {pending.attempts} failed writes: {error}")
+        audit_log.record({"kind": "goal_write_failed", "row": pending.row, "error": str(error), "attempts": pending.attempts})
+        pending.resolve(error=error)
+
+    def _write(self, batch):
+        if not _table_created:
+            # The database was down at startup; the writer thread creates the table instead
+            create_goals_table()
+        values = [self._values(pending.row) for pending in batch]
+        with db_cursor() as cursor:
+            returned = execute_values(
+                cursor,
+                f"INSERT INTO goals ({', '.join(GOAL_COLUMNS)}) VALUES %s RETURNING id, {', '.join(GOAL_COLUMNS)}",
+                values,
+                page_size=len(batch),
+                fetch=True
+            )
+        # RETURNING rows need not come back in VALUES order, so ids are matched to goals by
+        # row contents; goals with identical contents are interchangeable
+        waiting = {}
+        for pending, row_values in zip(batch, values):
+            waiting.setdefault(row_values, []).append(pending)
+        for goal_id, *row_values in returned:
+            waiting[self._values(dict(zip(GOAL_COLUMNS, row_values)))].pop(0).resolve(goal_id)
+
+    @staticmethod
+    def _values(row):
+        return tuple(None if row.get(column) is None else str(row[column]) for column in GOAL_COLUMNS)
+
+    def _start(self):
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        threading.Thread(target=self._run, name="goal-write-buffer", daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._flush_now and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+                self._flush_now = False
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Goal write buffer error: {e}")
+
+
+goal_buffer = GoalWriteBuffer()
+atexit.register(goal_buffer.flush)
@@ -0,0 +1,116 @@
+# lib/utils/audit.py
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from src.lib.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server, no cross-process lock needed
+    fcntl = None
+
+
+class AuditLog:
+    """
+    Append-only JSONL log of goal generations, written off the request path.
+
+    `record` only puts the event on an in-memory queue and never blocks; if the
+    queue is full the event is dropped and counted. A background thread writes
+    queued events in batches with one write and one fsync per batch, and rotates
+    the file to `path.1` ... `path.<backups>` once it reaches `max_bytes`. Writes
+    and rotation hold a lock file, so every gunicorn worker can share one log.
+    Events still queued are written when the process exits.
+    """
+
+    def __init__(self, path=None, max_bytes=None, backups=None, flush_interval=None, batch_size=None, max_queue=None):
+        self.path = path or Config.AUDIT_LOG_PATH
+        self.max_bytes = max_bytes or Config.AUDIT_LOG_MAX_BYTES
+        self.backups = backups if backups is not None else Config.AUDIT_LOG_BACKUPS
+        self.flush_interval = flush_interval or Config.AUDIT_FLUSH_INTERVAL
+        self.batch_size = batch_size or Config.AUDIT_BATCH_SIZE
+        self.max_queue = max_queue or Config.AUDIT_QUEUE_MAX
+        self._queue = queue.Queue(self.max_queue)
+        self._flush_lock = threading.Lock()
+        self._started_pid = None
+        self.dropped = 0
+
+    def record(self, event):
+        """Queue an event for the log; returns False if it had to be dropped."""
+        self._start()
+        event = dict(event, ts=datetime.now(timezone.utc).isoformat(), pid=os.getpid())
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Write everything currently queued."""
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"Warning: could not write {len(batch)} audit records: {e}")
+                    return
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        data = "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in batch).encode("utf-8")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self._rotate()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _rotate(self):
+        if not self.backups:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _start(self):
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        threading.Thread(target=self._run, name="audit-log", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Audit log writer error: {e}")
+
+
+audit_log = AuditLog()
+atexit.register(audit_log.flush)
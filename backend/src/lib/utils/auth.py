@@ -38,6 +38,25 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def user_role(email, department):
+    """The role put in an employee's token: 'admin', 'hr' or 'user'."""
+    if (email or "").strip().lower() in Config.ADMIN_EMAILS:
+        return 'admin'
+    if (department or "").strip().lower() in Config.HR_DEPARTMENTS:
+        return 'hr'
+    return 'user'
+
+def roles_required(*roles):
+    """Like login_required, but also answers 403 unless the token's role is one of `roles`."""
+    def decorator(f):
+        @wraps(f)
+        def check_role(*args, **kwargs):
+            if g.user.get('role') not in roles:
+                return jsonify({"error": "You don't have permission to access this resource"}), 403
+            return f(*args, **kwargs)
+        return login_required(check_role)
+    return decorator
+
 def configure_auth(app):
     """Configure authentication middleware for the app"""
     @app.before_request
@@ -46,9 +65,18 @@ def configure_auth(app):
         g.user = None
         
         # Skip authentication for public routes
-        if request.path in ['/api/health', '/api/auth/login', '/api/auth/register', '/api/password/hash']:
+        if request.path in ['/api/health', '/api/auth/login', '/api/auth/register', '/api/password/hash', '/api/prompts', '/api/metrics']:
             return
             
+        # Identify the caller when a valid token is sent, so routes without
+        # login_required can still use the employee's profile
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                g.user = jwt.decode(auth_header.split(' ')[1], SECRET_KEY, algorithms=['HS256'])
+            except jwt.InvalidTokenError:
+                g.user = None
+
         # The actual authentication is handled by the login_required decorator
         
     @app.errorhandler(401)
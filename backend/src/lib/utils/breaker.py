@@ -0,0 +1,152 @@
+# lib/utils/breaker.py
+
+import time
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS breaker_state (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    opened_at REAL,
+    probe_started_at REAL
+);
+CREATE TABLE IF NOT EXISTS breaker_calls (
+    name TEXT NOT NULL,
+    ts REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    latency REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_breaker_calls_name_ts ON breaker_calls (name, ts);
+"""
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state is shared by all gunicorn workers through SQLite.
+
+    Every LLM call is recorded with its outcome and latency; calls slower than
+    `slow_call_seconds` count as failures. When at least `min_calls` calls in
+    the last `window` seconds have a failure rate of `failure_rate` or more,
+    the circuit opens and callers go straight to their fallback. After
+    `cooldown` seconds a single probe call is let through: success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, name="gemini", window=None, min_calls=None, failure_rate=None,
+                 slow_call_seconds=None, cooldown=None):
+        self.name = name
+        self.window = window or Config.BREAKER_WINDOW
+        self.min_calls = min_calls or Config.BREAKER_MIN_CALLS
+        self.failure_rate = failure_rate or Config.BREAKER_FAILURE_RATE
+        self.slow_call_seconds = slow_call_seconds or Config.BREAKER_SLOW_CALL_SECONDS
+        self.cooldown = cooldown or Config.BREAKER_COOLDOWN
+
+    def _connection(self):
+        return connect("breaker", _SCHEMA)
+
+    def _state(self, connection):
+        row = connection.execute(
+            "SELECT state, opened_at, probe_started_at FROM breaker_state WHERE name = ?", (self.name,)
+        ).fetchone()
+        return row or (CLOSED, None, None)
+
+    def _set_state(self, connection, state, opened_at=None, probe_started_at=None):
+        connection.execute(
+            "INSERT OR REPLACE INTO breaker_state (name, state, opened_at, probe_started_at) VALUES (?, ?, ?, ?)",
+            (self.name, state, opened_at, probe_started_at)
+        )
+
+    def allow(self):
+        """Return True if a call may go ahead now."""
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                state, opened_at, probe_started_at = self._state(connection)
+                allowed = True
+                if state == OPEN:
+                    allowed = now - opened_at >= self.cooldown
+                    if allowed:
+                        self._set_state(connection, HALF_OPEN, opened_at, now)
+                elif state == HALF_OPEN:
+                    # One probe at a time; a probe that never reported back is replaced
+                    allowed = probe_started_at is None or now - probe_started_at >= self.slow_call_seconds
+                    if allowed:
+                        self._set_state(connection, HALF_OPEN, opened_at, now)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            return allowed
+        except Exception as e:
+            print(f"Warning: circuit breaker unavailable, allowing call: {e}")
+            return True
+
+    def record_success(self, latency):
+        self._record(latency <= self.slow_call_seconds, latency)
+
+    def record_failure(self, latency):
+        self._record(False, latency)
+
+    def _record(self, ok, latency):
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT INTO breaker_calls (name, ts, ok, latency) VALUES (?, ?, ?, ?)",
+                    (self.name, now, int(ok), latency)
+                )
+                connection.execute(
+                    "DELETE FROM breaker_calls WHERE name = ? AND ts < ?", (self.name, now - self.window)
+                )
+                state, _, _ = self._state(connection)
+                if state == HALF_OPEN:
+                    if ok:
+                        self._set_state(connection, CLOSED)
+                    else:
+                        self._set_state(connection, OPEN, now)
+                elif state == CLOSED and not ok:
+                    calls, failures = connection.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(1 - ok), 0) FROM breaker_calls WHERE name = ?", (self.name,)
+                    ).fetchone()
+                    if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                        print(f"Circuit '{self.name}' opened after {failures}/{calls} failed calls")
+                        self._set_state(connection, OPEN, now)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            print(f"Warning: could not record call in circuit breaker: {e}")
+
+    def status(self):
+        """Breaker state and recent call statistics for the health endpoint."""
+        try:
+            connection = self._connection()
+            state, opened_at, _ = self._state(connection)
+            calls, failures, avg_latency = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(1 - ok), 0), AVG(latency) FROM breaker_calls WHERE name = ? AND ts >= ?",
+                (self.name, time.time() - self.window)
+            ).fetchone()
+            return {
+                "state": state,
+                "opened_at": opened_at,
+                "window_seconds": self.window,
+                "calls": calls,
+                "failures": failures,
+                "avg_latency_ms": round(avg_latency * 1000, 1) if avg_latency is not None else None
+            }
+        except Exception as e:
+            return {"state": "unknown", "error": str(e)}
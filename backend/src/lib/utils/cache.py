@@ -0,0 +1,89 @@
+# lib/utils/cache.py
+
+import hashlib
+import json
+import re
+import time
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed_at ON cache_entries (accessed_at);
+"""
+
+
+def normalize_text(value):
+    """Lowercase and collapse whitespace so trivially different inputs share a key."""
+    return re.sub(r"\s+", " ", str(value or "")).strip().casefold()
+
+
+class ResultCache:
+    """
+    TTL and size bounded cache stored in a local SQLite file.
+
+    All gunicorn workers on the host open the same file, so a result generated
+    by one worker is served by every other worker. Entries are evicted when
+    they expire or, once `max_entries` is exceeded, least recently used first.
+    """
+
+    def __init__(self, name="goal_cache", ttl=None, max_entries=None):
+        self.name = name
+        self.ttl = ttl if ttl is not None else Config.GOAL_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else Config.GOAL_CACHE_MAX_ENTRIES
+
+    def _connection(self):
+        return connect(self.name, _SCHEMA)
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a cache key from already-normalized parts."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        try:
+            connection = self._connection()
+            now = time.time()
+            row = connection.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if not row:
+                return None
+            connection.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        except Exception as e:
+            print(f"Warning: cache read failed: {e}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            connection = self._connection()
+            now = time.time()
+            expires_at = now + (ttl if ttl is not None else self.ttl)
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._evict(connection, now)
+        except Exception as e:
+            print(f"Warning: cache write failed: {e}")
+
+    def delete(self, key):
+        try:
+            self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"Warning: cache delete failed: {e}")
+
+    def _evict(self, connection, now):
+        connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        connection.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
@@ -0,0 +1,137 @@
+# lib/utils/hashing.py
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from src.lib.config import Config
+from src.lib.utils.metrics import metrics, current_endpoint
+
+
+class HashPoolSaturated(Exception):
+    """Raised when the bcrypt pool already has as much work queued as it accepts."""
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash and check calls in a dedicated process pool.
+
+    bcrypt is deliberately slow CPU work; running it in the request thread
+    blocks the web worker. At most `workers + max_queue` calls are accepted at
+    once; beyond that HashPoolSaturated is raised so the route can answer 429
+    instead of letting a burst of logins starve everything else. A call holds
+    its slot until the child finishes, even if the caller gave up waiting. The
+    pool is started lazily in each process, so it is never inherited through
+    fork, and replaced if a child dies.
+    """
+
+    def __init__(self, workers=None, max_queue=None, rounds=None, timeout=None):
+        self.workers = workers or Config.HASH_POOL_WORKERS
+        self.max_queue = max_queue if max_queue is not None else Config.HASH_POOL_MAX_QUEUE
+        self.rounds = rounds or Config.BCRYPT_ROUNDS
+        self.timeout = timeout or Config.HASH_TIMEOUT
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def hash_password(self, password):
+        return self._run(_hash_password, password, self.rounds)
+
+    def check_password(self, password, hashed):
+        if isinstance(hashed, bytes):
+            hashed = hashed.decode('utf-8')
+        return self._run(_check_password, password, hashed)
+
+    def stats(self):
+        """Pool saturation metrics for the health endpoint."""
+        with self._lock:
+            capacity = self.workers + self.max_queue
+            return {
+                "workers": self.workers,
+                "bcrypt_rounds": self.rounds,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "capacity": capacity,
+                "saturation": round(self._in_flight / capacity, 3),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_latency_ms": round(self._busy_seconds / self._completed * 1000, 1) if self._completed else 0.0
+            }
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def _discard(self, executor):
+        """Drop a pool that lost a child (crash, OOM kill); the next call starts a new one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, args):
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def _release(self, started):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._busy_seconds += time.monotonic() - started
+
+    def _run(self, fn, *args):
+        stage = "bcrypt_hash" if fn is _hash_password else "bcrypt_check"
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                metrics.inc("goal_portal_bcrypt_rejected_total", stage=stage, endpoint=current_endpoint())
+                raise HashPoolSaturated("Password hashing is busy, please retry shortly")
+            self._in_flight += 1
+
+        started = time.monotonic()
+        future = None
+        try:
+            with metrics.timer(stage):
+                try:
+                    executor, future = self._submit(fn, args)
+                    return future.result(timeout=self.timeout)
+                except BrokenProcessPool:
+                    if future is not None:
+                        self._discard(executor)
+                    print("Warning: bcrypt pool lost a worker process, restarting it")
+                    executor, future = self._submit(fn, args)
+                    return future.result(timeout=self.timeout)
+        finally:
+            # The slot is freed when the child is done, not when this caller stops waiting
+            if future is None:
+                self._release(started)
+            else:
+                future.add_done_callback(lambda _: self._release(started))
+
+
+password_hasher = PasswordHasher()
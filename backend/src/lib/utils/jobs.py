@@ -0,0 +1,145 @@
+# lib/utils/jobs.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    Local job queue stored in SQLite and drained by a pool of background threads.
+
+    Any gunicorn worker can submit or look up a job. Each worker process runs its
+    own small pool of threads that claim pending jobs atomically, so a slow job
+    never holds the web worker that accepted it. Jobs left running by a worker
+    that died are requeued after JOB_STALE_SECONDS.
+    """
+
+    def __init__(self, handlers, name="jobs", workers=None, poll_interval=1.0):
+        self.handlers = handlers
+        self.name = name
+        self.workers = workers if workers is not None else Config.JOB_WORKERS
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._started_pid = None
+
+    def _connection(self):
+        return connect(self.name, _SCHEMA)
+
+    def submit(self, kind, payload):
+        """Queue a job and return its id without waiting for it to run."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'pending', ?, ?)",
+            (job_id, kind, json.dumps(payload), time.time())
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the public view of a job, or None if it does not exist."""
+        row = self._connection().execute(
+            "SELECT id, kind, status, result, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7]
+        }
+
+    def start(self):
+        """Start this process's worker threads if they are not running yet."""
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            for index in range(self.workers):
+                threading.Thread(target=self._work, name=f"{self.name}-worker-{index}", daemon=True).start()
+
+    def _claim(self):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Requeue jobs whose worker disappeared and drop old finished jobs
+            connection.execute(
+                "UPDATE jobs SET status = 'pending', started_at = NULL, worker = NULL "
+                "WHERE status = 'running' AND started_at < ?",
+                (now - Config.JOB_STALE_SECONDS,)
+            )
+            connection.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (now - Config.JOB_RETENTION_SECONDS,)
+            )
+            row = connection.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, worker = ? WHERE id = ?",
+                    (now, f"{os.getpid()}:{threading.current_thread().name}", row[0])
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"Job queue claim failed: {e}")
+                job = None
+
+            if not job:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id, kind, payload = job
+            try:
+                result = self.handlers[kind](json.loads(payload))
+                self._finish(job_id, "succeeded", result=result)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                self._finish(job_id, "failed", error=str(e))
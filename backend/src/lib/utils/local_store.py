@@ -0,0 +1,38 @@
+# lib/utils/local_store.py
+
+import os
+import sqlite3
+import threading
+from src.lib.config import Config
+
+_local = threading.local()
+
+
+def store_path(name):
+    """Return the path of the SQLite file called `name` inside LOCAL_STATE_DIR."""
+    os.makedirs(Config.LOCAL_STATE_DIR, exist_ok=True)
+    return os.path.join(Config.LOCAL_STATE_DIR, f"{name}.sqlite3")
+
+
+def connect(name, schema=""):
+    """
+    Get this thread's connection to a local SQLite store.
+
+    Stores live on the local disk so every gunicorn worker on the host sees the
+    same data. Connections are cached per thread and per process, so a forked
+    worker never reuses a connection opened by its parent.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    connection = connections.get(name)
+    if connection is None:
+        connection = sqlite3.connect(store_path(name), timeout=10, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if schema:
+            connection.executescript(schema)
+        connections[name] = connection
+    return connection
@@ -0,0 +1,252 @@
+# lib/utils/metrics.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from flask import request, g, has_request_context
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    process TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (process, metric, labels)
+);
+CREATE TABLE IF NOT EXISTS processes (
+    process TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+"""
+
+# Seconds; LLM calls can take tens of seconds, DB and bcrypt calls milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+# Folded-in totals of worker processes that have exited
+RETIRED = "retired"
+
+METRICS = {
+    "goal_portal_http_request_duration_seconds": (HISTOGRAM, "Time to produce an HTTP response, by route and status."),
+    "goal_portal_stage_duration_seconds": (HISTOGRAM, "Time spent in one stage of request handling, by stage, route and outcome."),
+    "goal_portal_llm_fallback_total": (COUNTER, "Requests answered with fallback goals instead of LLM output, by route and reason."),
+    "goal_portal_goal_cache_total": (COUNTER, "Goal cache lookups by route, kind and result (hit or miss)."),
+}
+
+
+def current_endpoint():
+    """The route pattern of the current request, e.g. /api/jobs/<job_id>, or 'background' outside requests."""
+    if not has_request_context():
+        return "background"
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+class _Timer:
+    def __init__(self):
+        self.outcome = "ok"
+
+
+class Metrics:
+    """
+    Counters and latency histograms aggregated across all gunicorn workers.
+
+    Observations are accumulated in memory and a background thread writes each
+    process's running totals to SQLite every METRICS_FLUSH_INTERVAL seconds, so
+    recording a sample never touches the disk. `render` adds up the totals of
+    every process. Totals of processes that stopped reporting are folded into a
+    single 'retired' row so counters stay monotonic across worker restarts.
+    """
+
+    def __init__(self, name="metrics", flush_interval=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.flush_interval = flush_interval or Config.METRICS_FLUSH_INTERVAL
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._values = {}
+        self._dirty = False
+        self._pid = None
+        self._process = None
+
+    def _connection(self):
+        return connect(self.name, _SCHEMA)
+
+    def _ensure_process(self):
+        # Called with the lock held. A forked worker starts from zero rather than
+        # re-reporting what its parent recorded before the fork.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._process = f"{self._pid}-{uuid.uuid4().hex[:8]}"
+            self._values = {}
+            self._dirty = False
+            threading.Thread(target=self._run, name="metrics-flush", daemon=True).start()
+
+    def inc(self, metric, amount=1, **labels):
+        key = (metric, json.dumps(labels, sort_keys=True))
+        with self._lock:
+            self._ensure_process()
+            self._values[key] = self._values.get(key, 0) + amount
+            self._dirty = True
+
+    def observe(self, metric, seconds, **labels):
+        key = (metric, json.dumps(labels, sort_keys=True))
+        with self._lock:
+            self._ensure_process()
+            value = self._values.get(key)
+            if value is None:
+                # One count per bucket (not cumulative), then the +Inf bucket, sum and count
+                value = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+            value[index] += 1
+            value[-2] += seconds
+            value[-1] += 1
+            self._dirty = True
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """
+        Time the enclosed block as one stage of the current request. The outcome
+        label is 'error' if the block raises, otherwise 'ok' unless the caller
+        sets `timer.outcome`.
+        """
+        timer = _Timer()
+        started = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            timer.outcome = "error"
+            raise
+        finally:
+            self.observe(
+                "goal_portal_stage_duration_seconds", time.perf_counter() - started,
+                stage=stage, endpoint=labels.pop("endpoint", None) or current_endpoint(),
+                outcome=timer.outcome, **labels
+            )
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: could not write metrics: {e}")
+
+    def flush(self):
+        """Write this process's totals to the shared store."""
+        with self._lock:
+            self._ensure_process()
+            process = self._process
+            dirty = self._dirty
+            rows = [(metric, labels, json.dumps(value)) for (metric, labels), value in self._values.items()]
+            self._dirty = False
+
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR REPLACE INTO processes (process, seen_at) VALUES (?, ?)", (process, now))
+            if dirty:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO samples (process, metric, labels, value) VALUES (?, ?, ?, ?)",
+                    [(process,) + row for row in rows]
+                )
+            self._retire_stale(connection, now)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def _retire_stale(self, connection, now):
+        stale = [row[0] for row in connection.execute(
+            "SELECT process FROM processes WHERE seen_at < ?", (now - 10 * self.flush_interval - 60,)
+        )]
+        for process in stale:
+            for metric, labels, value in connection.execute(
+                "SELECT metric, labels, value FROM samples WHERE process = ?", (process,)
+            ).fetchall():
+                row = connection.execute(
+                    "SELECT value FROM samples WHERE process = ? AND metric = ? AND labels = ?", (RETIRED, metric, labels)
+                ).fetchone()
+                total = self._add(json.loads(row[0]), json.loads(value)) if row else json.loads(value)
+                connection.execute(
+                    "INSERT OR REPLACE INTO samples (process, metric, labels, value) VALUES (?, ?, ?, ?)",
+                    (RETIRED, metric, labels, json.dumps(total))
+                )
+            connection.execute("DELETE FROM samples WHERE process = ?", (process,))
+            connection.execute("DELETE FROM processes WHERE process = ?", (process,))
+
+    @staticmethod
+    def _add(a, b):
+        if isinstance(a, list):
+            return [x + y for x, y in zip(a, b)]
+        return a + b
+
+    def _totals(self):
+        self.flush()
+        totals = {}
+        for metric, labels, value in self._connection().execute("SELECT metric, labels, value FROM samples"):
+            key = (metric, labels)
+            totals[key] = self._add(totals[key], json.loads(value)) if key in totals else json.loads(value)
+        return totals
+
+    def render(self):
+        """Return the totals of every worker in the Prometheus text exposition format."""
+        totals = self._totals()
+
+        lines = []
+        for metric, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (name, labels), value in sorted(totals.items()):
+                if name != metric:
+                    continue
+                labels = json.loads(labels)
+                if kind == COUNTER:
+                    lines.append(f"{metric}{self._labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), value):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{self._labels(dict(labels, le=str(bound)))} {cumulative}")
+                lines.append(f"{metric}_sum{self._labels(labels)} {value[-2]}")
+                lines.append(f"{metric}_count{self._labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        escaped = (
+            f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for key, value in sorted(labels.items())
+        )
+        return "{" + ",".join(escaped) + "}"
+
+
+metrics = Metrics()
+
+
+def configure_metrics(app):
+    """Record the duration of every request by route and status code"""
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = getattr(g, "request_started", None)
+        if started is not None:
+            metrics.observe(
+                "goal_portal_http_request_duration_seconds", time.perf_counter() - started,
+                endpoint=current_endpoint(), method=request.method, status=str(response.status_code)
+            )
+        return response
@@ -0,0 +1,174 @@
+# lib/utils/prompts.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from src.lib.config import Config
+from src.lib.utils.cache import normalize_text
+from src.lib.utils.relevance import DepartmentMatcher, TfidfIndex
+
+DEFAULT_PROMPTS_PATH = Path(__file__).parent / "prompts.json"
+
+
+class PromptSnapshot:
+    """
+    One parsed version of prompts.json. Snapshots are never modified after they
+    are built, so a request keeps a consistent view even if a reload happens
+    while it is running.
+    """
+
+    def __init__(self, data, raw=b"", mtime=None):
+        self.data = data
+        self.raw = raw
+        self.mtime = mtime
+        self.digest = hashlib.sha256(raw).hexdigest()
+        self.core_values = data.get("core_values", [])
+        self.framework_3e = data.get("framework_3e", [])
+        self.company_top_bets = data.get("company_top_bets", [])
+        # The static prompt sections, formatted once instead of on every request
+        self.core_values_text = str(self.core_values)
+        self.framework_3e_text = str(self.framework_3e)
+        # Short reference IDs (CV1, E1, TB1, ...) so edit prompts can list the
+        # options by name only and the model can answer with an ID
+        self.references = {}
+        reference_texts = {}
+        # Per prefix, (normalized label, normalized entry, ID), longest label first, to
+        # recognise free-text values that name an entry
+        self._reference_labels = {}
+        for prefix, entries in (("CV", self.core_values), ("E", self.framework_3e), ("TB", self.company_top_bets)):
+            labels = []
+            for index, entry in enumerate(entries, 1):
+                self.references[f"{prefix}{index}"] = entry
+                label = str(entry).split(':')[0].strip()
+                labels.append(f"{prefix}{index} {label}")
+                self._reference_labels.setdefault(prefix, []).append(
+                    (normalize_text(label), normalize_text(entry), f"{prefix}{index}"))
+            self._reference_labels.get(prefix, []).sort(key=lambda item: -len(item[0]))
+            reference_texts[prefix] = "; ".join(labels)
+        self.core_value_ids_text = reference_texts["CV"]
+        self.framework_3e_ids_text = reference_texts["E"]
+        self.top_bet_ids_text = reference_texts["TB"]
+        # Relevance index used to send only the most relevant entries to the LLM
+        self.departments = {
+            key: value for key, value in data.items()
+            if isinstance(value, dict) and "examples" in value
+        }
+        self.department_matcher = DepartmentMatcher(
+            {key: value.get("aliases", []) for key, value in self.departments.items()}
+        )
+        self._example_departments = [key for key, value in self.departments.items() for _ in value["examples"]]
+        self.examples_index = TfidfIndex(example for value in self.departments.values() for example in value["examples"])
+        self.top_bets_index = TfidfIndex(self.company_top_bets)
+
+    def resolve_reference(self, value):
+        """Expand a reference ID such as 'TB2' to its full entry; other values are returned unchanged."""
+        if isinstance(value, str):
+            return self.references.get(value.strip().upper(), value)
+        return value
+
+    def reference_id(self, value, prefix):
+        """
+        Return the ID of the `prefix` entry (CV, E or TB) that `value` names: the
+        ID itself, the full entry, or text starting with the entry's label, such
+        as "ELEVATE - grow the customer base". None if it names no entry.
+        """
+        if not isinstance(value, str):
+            return None
+        key = value.strip().upper()
+        if key.startswith(prefix) and key[len(prefix):].isdigit() and key in self.references:
+            return key
+        text = normalize_text(value)
+        for label, entry, reference_id in self._reference_labels.get(prefix, []):
+            if text == entry or (label and text.startswith(label) and not text[len(label):len(label) + 1].isalnum()):
+                return reference_id
+        return None
+
+    def examples(self, department, query="", k=None):
+        """
+        Return up to `k` example goals for a department, ranked by relevance to
+        `query`. Departments that match no prompts.json entry are ranked against
+        the examples of every department.
+        """
+        k = k or Config.PROMPT_TOP_EXAMPLES
+        key = self.department_matcher.match(department)
+        candidates = None
+        if key is not None:
+            candidates = [index for index, example_key in enumerate(self._example_departments) if example_key == key]
+        return [self.examples_index.documents[index] for index in self.examples_index.top_k(query, k, candidates)]
+
+    def top_bets(self, query="", k=None):
+        """Return the `k` company top bets most relevant to `query`, in prompts.json order."""
+        k = k or Config.PROMPT_TOP_BETS
+        return [self.company_top_bets[index] for index in self.top_bets_index.top_k(query, k)]
+
+    def context_section(self, department, query):
+        """Return the examples, core values, 3E and top bets part of the context."""
+        return (
+            f"Example Goals: {self.examples(department, query)}\n"
+            f"Core Values: {self.core_values_text}\n"
+            f"3E Strategic Framework: {self.framework_3e_text}\n"
+            f"Company Top Bets: {self.top_bets(query)}"
+        )
+
+    def shared_section(self, queries):
+        """
+        Return the core values, 3E and top bets part of a batched prompt's
+        context: the top bets relevant to any of `queries`, in prompts.json order.
+        """
+        relevant = set()
+        for query in queries:
+            relevant.update(self.top_bets_index.top_k(query, Config.PROMPT_TOP_BETS))
+        return (
+            f"Core Values: {self.core_values_text}\n"
+            f"3E Strategic Framework: {self.framework_3e_text}\n"
+            f"Company Top Bets: {[self.company_top_bets[index] for index in sorted(relevant)]}"
+        )
+
+
+class PromptStore:
+    """
+    Serves the current PromptSnapshot of prompts.json.
+
+    The file's mtime is checked at most every `check_interval` seconds, and the
+    file is parsed again only when it changed. The new snapshot replaces the old
+    one in a single assignment. If the new file cannot be parsed, the previous
+    snapshot stays in use.
+    """
+
+    def __init__(self, path=DEFAULT_PROMPTS_PATH, check_interval=1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._failed_mtime = None
+        self._snapshot = PromptSnapshot({})
+        self._reload()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                self._reload()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"Warning: Could not stat prompts file {self.path}: {e}")
+            return
+        if mtime in (self._snapshot.mtime, self._failed_mtime):
+            return
+        try:
+            raw = self.path.read_bytes()
+            self._snapshot = PromptSnapshot(json.loads(raw), raw, mtime)
+            print(f"Loaded prompts from {self.path}")
+        except Exception as e:
+            self._failed_mtime = mtime
+            print(f"Warning: Could not load prompts.json: {e}")
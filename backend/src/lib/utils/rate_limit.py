@@ -0,0 +1,151 @@
+# lib/utils/rate_limit.py
+
+import asyncio
+import inspect
+import math
+import time
+from functools import wraps
+from flask import request, jsonify, g
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a client is over budget; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket per client, shared by all gunicorn workers through SQLite.
+
+    Each client gets `burst` tokens, refilled at `rate` tokens per second, and
+    every call takes one (or `cost` for calls worth several). A client that is out of tokens may still reserve one
+    if it becomes available within `max_wait` seconds: the bucket goes
+    negative and the caller sleeps until its turn, which makes a short, bounded
+    queue per client. Anything beyond that is rejected with the time until a
+    token frees up.
+    """
+
+    def __init__(self, name="rate_limit", rate=None, burst=None, max_wait=None):
+        self.name = name
+        self.rate = rate or Config.RATE_LIMIT_RATE
+        self.burst = burst or Config.RATE_LIMIT_BURST
+        self.max_wait = max_wait if max_wait is not None else Config.RATE_LIMIT_MAX_WAIT
+        self._last_purge = 0.0
+
+    def _connection(self):
+        return connect(self.name, _SCHEMA)
+
+    def reserve(self, key, cost=1, max_wait=None):
+        """
+        Take `cost` tokens for `key` and return how long the caller must wait
+        before using them. Raises RateLimitExceeded when the wait would exceed
+        `max_wait` (by default the limiter's own).
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                wait = max(0.0, (cost - tokens) / self.rate)
+                if wait > max_wait:
+                    connection.execute("ROLLBACK")
+                    raise RateLimitExceeded(wait - max_wait)
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens - cost, now)
+                )
+                self._purge(connection, now)
+                connection.execute("COMMIT")
+            except RateLimitExceeded:
+                raise
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            return wait
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Warning: rate limiter unavailable, allowing call: {e}")
+            return 0.0
+
+    def acquire(self, key, cost=1, max_wait=None):
+        """Wait for `cost` tokens for `key`, or raise RateLimitExceeded."""
+        wait = self.reserve(key, cost, max_wait)
+        if wait:
+            time.sleep(wait)
+
+    def _purge(self, connection, now):
+        # Buckets that have been full for a while carry no state worth keeping
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        connection.execute("DELETE FROM buckets WHERE updated_at < ?", (now - self.burst / self.rate - 60,))
+
+
+def client_key():
+    """The JWT identity of the caller if there is one, otherwise its IP address."""
+    user = getattr(g, "user", None)
+    if user and user.get("email"):
+        return f"user:{user['email'].lower()}"
+    return f"ip:{request.remote_addr}"
+
+
+llm_rate_limiter = RateLimiter()
+bulk_rate_limiter = RateLimiter(name="bulk_rate_limit", rate=Config.BULK_RATE_LIMIT_RATE,
+                                burst=Config.BULK_RATE_LIMIT_BURST, max_wait=Config.BULK_RATE_LIMIT_MAX_WAIT)
+
+
+def _too_many_requests(error):
+    message = "Too many requests, please slow down"
+    response = jsonify({"error": message, "message": message, "retry_after": round(error.retry_after, 1)})
+    response.headers["Retry-After"] = str(max(1, math.ceil(error.retry_after)))
+    return response, 429
+
+
+def rate_limited(f, limiter=llm_rate_limiter):
+    """
+    Route decorator that answers 429 with Retry-After when the caller is over
+    budget. Works on async views too, awaiting the queueing delay.
+    """
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_coroutine(*args, **kwargs):
+            try:
+                # reserve() holds a SQLite write lock; keep it off the event loop
+                wait = await asyncio.to_thread(limiter.reserve, client_key())
+            except RateLimitExceeded as e:
+                return _too_many_requests(e)
+            if wait:
+                await asyncio.sleep(wait)
+            return await f(*args, **kwargs)
+        return decorated_coroutine
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            limiter.acquire(client_key())
+        except RateLimitExceeded as e:
+            return _too_many_requests(e)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def bulk_rate_limited(f):
+    """rate_limited against the bulk bucket, so a roster upload is refused while the caller's budget is spent."""
+    return rate_limited(f, limiter=bulk_rate_limiter)
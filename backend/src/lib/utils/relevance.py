@@ -0,0 +1,86 @@
+# lib/utils/relevance.py
+
+import difflib
+import math
+import re
+from collections import Counter
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or our so that the their this to "
+    "up we will with within end q1 q2 q3 q4 through".split()
+)
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_PATTERN.findall(str(text or "").lower()) if token not in STOP_WORDS]
+
+
+class TfidfIndex:
+    """Small in-memory TF-IDF index over a fixed list of short documents."""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        tokenized = [tokenize(document) for document in self.documents]
+        document_frequency = Counter(token for tokens in tokenized for token in set(tokens))
+        total = len(self.documents)
+        self.idf = {token: math.log((1 + total) / (1 + count)) + 1 for token, count in document_frequency.items()}
+        self.vectors = [self._vector(tokens) for tokens in tokenized]
+
+    def _vector(self, tokens):
+        weights = {token: count * self.idf.get(token, 0.0) for token, count in Counter(tokens).items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {token: weight / norm for token, weight in weights.items()} if norm else {}
+
+    def top_k(self, query, k, candidates=None):
+        """
+        Return the indices of the `k` documents most similar to `query`, in
+        document order. Ties, and documents that share no terms with the query,
+        keep their original order.
+        """
+        candidates = range(len(self.documents)) if candidates is None else candidates
+        query_vector = self._vector(tokenize(query))
+        scored = sorted(
+            candidates,
+            key=lambda index: (-sum(weight * self.vectors[index].get(token, 0.0) for token, weight in query_vector.items()), index)
+        )
+        return sorted(scored[:k])
+
+
+class DepartmentMatcher:
+    """
+    Maps free-form department names such as "Development - HKPL" to the
+    department keys in prompts.json, using each key's aliases and fuzzy
+    matching. Results are memoized per input.
+    """
+
+    def __init__(self, aliases, cutoff=0.8, max_memo=1024):
+        self.names = {}
+        for key, key_aliases in aliases.items():
+            for name in [key] + list(key_aliases):
+                self.names[" ".join(tokenize(name)) or name.lower()] = key
+        self.cutoff = cutoff
+        self.max_memo = max_memo
+        self._memo = {}
+
+    def match(self, department):
+        """Return the matching department key, or None."""
+        normalized = " ".join(_TOKEN_PATTERN.findall(str(department or "").lower()))
+        if normalized in self._memo:
+            return self._memo[normalized]
+
+        tokens = normalized.split()
+        # Whole name first, then every run of words, longest first, then fuzzy matches
+        phrases = [" ".join(tokens[start:start + size]) for size in range(len(tokens), 0, -1) for start in range(len(tokens) - size + 1)]
+        match = next((self.names[phrase] for phrase in phrases if phrase in self.names), None)
+        if match is None:
+            for phrase in phrases:
+                close = difflib.get_close_matches(phrase, self.names, n=1, cutoff=self.cutoff)
+                if close:
+                    match = self.names[close[0]]
+                    break
+
+        if len(self._memo) < self.max_memo:
+            self._memo[normalized] = match
+        return match
@@ -0,0 +1,191 @@
+# lib/utils/singleflight.py
+
+import asyncio
+import threading
+import time
+import uuid
+from src.lib.config import Config
+from src.lib.utils.local_store import connect
+
+# A lease row is held while its owner does the work. If the work fails, the row
+# keeps the error for a moment so the workers already waiting on it can take it.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    error TEXT
+);
+"""
+
+
+class SingleFlightError(Exception):
+    """Raised to callers that waited on a call which failed in another worker."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key, so only one of them does the work.
+
+    Inside a process, followers wait on the leader's in-memory result. Across
+    gunicorn workers, the leader holds a lease row in SQLite; a worker that finds
+    the lease taken polls `lookup(key)` (normally the shared result cache) until
+    the leader stores a result there. If the leader fails, its error is left on
+    the lease for a few poll intervals and raised to the workers that were
+    already waiting on that lease, so they do not repeat the failed work one
+    after another; a call that arrives later does the work again. Results the
+    cache never stores, such as fallback goals, are not shared across workers:
+    once the lease is released, a waiting worker does the work itself. `ado`
+    does the same for coroutines on an event loop, without blocking it while
+    waiting.
+    """
+
+    def __init__(self, lookup, name="singleflight", lease_seconds=None, poll_interval=0.25):
+        self.lookup = lookup
+        self.name = name
+        self.lease_seconds = lease_seconds or Config.SINGLE_FLIGHT_LEASE
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def _connection(self):
+        return connect(self.name, _SCHEMA)
+
+    def do(self, key, fn):
+        """Return fn(), or the result of an identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_across_workers(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, fn):
+        """Return await fn(), or the result of an identical call already in flight."""
+        call = self._async_calls.get(key)
+        if call is not None:
+            return await asyncio.shield(call)
+
+        call = self._async_calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._ado_across_workers(key, fn)
+            call.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            # Mark the error retrieved so a leader without followers does not log it twice
+            call.exception()
+            raise
+        finally:
+            del self._async_calls[key]
+
+    async def _ado_across_workers(self, key, fn):
+        # The lookup and lease calls hit SQLite, which can wait on another worker's lock
+        owner = uuid.uuid4().hex
+        waited_on = None
+        while True:
+            result = await asyncio.to_thread(self.lookup, key)
+            if result is not None:
+                return result
+            holder = await asyncio.to_thread(self._acquire, key, owner, waited_on)
+            if holder is None:
+                try:
+                    result = await fn()
+                except Exception as e:
+                    await asyncio.to_thread(self._release, key, owner, e)
+                    raise
+                await asyncio.to_thread(self._release, key, owner)
+                return result
+            waited_on = holder
+            await asyncio.sleep(self.poll_interval)
+
+    def _do_across_workers(self, key, fn):
+        owner = uuid.uuid4().hex
+        waited_on = None
+        while True:
+            result = self.lookup(key)
+            if result is not None:
+                return result
+            holder = self._acquire(key, owner, waited_on)
+            if holder is None:
+                try:
+                    result = fn()
+                except Exception as e:
+                    self._release(key, owner, e)
+                    raise
+                self._release(key, owner)
+                return result
+            waited_on = holder
+            time.sleep(self.poll_interval)
+
+    def _acquire(self, key, owner, waited_on=None):
+        """
+        Take the lease on `key` and return None, or return the owner holding it.
+        Raises SingleFlightError if `waited_on`, the holder this caller has been
+        waiting for, failed; a failed lease held by anyone else is taken over.
+        """
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.execute(
+                "DELETE FROM leases WHERE key = ? AND (expires_at <= ? OR (error IS NOT NULL AND owner IS NOT ?))",
+                (key, now, waited_on)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + self.lease_seconds)
+            )
+            if cursor.rowcount == 1:
+                return None
+            row = connection.execute("SELECT owner, error FROM leases WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            print(f"Warning: single-flight lease unavailable, running call directly: {e}")
+            return None
+        if row is None:
+            # Released between the insert and the select; try again on the next poll
+            return waited_on
+        holder, error = row
+        if error is not None and holder == waited_on:
+            raise SingleFlightError(error)
+        return holder
+
+    def _release(self, key, owner, error=None):
+        """Drop the lease, or after a failure keep its error briefly for the callers waiting on it."""
+        try:
+            connection = self._connection()
+            if error is None:
+                connection.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+            else:
+                connection.execute(
+                    "UPDATE leases SET error = ?, expires_at = ? WHERE key = ? AND owner = ?",
+                    (str(error) or type(error).__name__, time.time() + 4 * self.poll_interval, key, owner)
+                )
+        except Exception as e:
+            print(f"Warning: could not release single-flight lease: {e}")
@@ -0,0 +1,62 @@
+# startup_benchmark.py
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import src.wsgi
+(which builds the Flask app), and which heavy modules that pulls in.
+
+Each run uses a new Python process, as a new gunicorn worker or container
+would. Exits with status 1 when the median import time is over --budget-ms
+or when a module that should only load on first use is imported at startup.
+
+    python startup_benchmark.py --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported on first use, never at startup
+LAZY_MODULES = ["sympy", "langchain_core", "langchain_google_genai", "google.genai", "openpyxl"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import src.wsgi
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure():
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=backend_dir, capture_output=True, text=True, check=True
+    ).stdout
+    # The app prints while it starts; the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the app's cold-start import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000, help="Fail if the median import time is above this")
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    times_ms = [result["seconds"] * 1000 for result in results]
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    median_ms = statistics.median(times_ms)
+
+    print(f"import src.wsgi: median {median_ms:.0f} ms, min {min(times_ms):.0f} ms, max {max(times_ms):.0f} ms over {args.runs} runs")
+    print(f"budget: {args.budget_ms:.0f} ms")
+    if loaded:
+        print(f"lazy modules imported at startup: {', '.join(loaded)}")
+
+    if median_ms > args.budget_ms or loaded:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,3 +21,72 @@ def activate(c):
 @task
 def run(c):
     c.run("python ./src/app.py")
+
+@task(help={
+    "workers": "gunicorn worker processes",
+    "threads": "threads per worker",
+    "concurrency": "concurrent benchmark clients",
+    "requests": "total requests to send",
+    "endpoints": "comma-separated endpoints to exercise",
+    "latency": "stub LLM latency in seconds",
+    "failure_rate": "share of stub LLM calls that fail",
+    "malformed_rate": "share of stub LLM calls that return broken JSON",
+})
+def bench(c, workers=4, threads=4, concurrency=16, requests=400, endpoints="generate,stream,edit,prompts",
+          latency=0.5, failure_rate=0.0, malformed_rate=0.0, port=5055, json_out="", asgi=False):
+    """Run the API under gunicorn (or uvicorn with --asgi) with the stub LLM backend and benchmark it"""
+    import os
+    import subprocess
+    import tempfile
+    import time
+    import urllib.request
+
+    env = dict(
+        os.environ,
+        LLM_BACKEND="stub",
+        LLM_STUB_LATENCY=str(latency),
+        LLM_STUB_FAILURE_RATE=str(failure_rate),
+        LLM_STUB_MALFORMED_RATE=str(malformed_rate),
+        LOCAL_STATE_DIR=tempfile.mkdtemp(prefix="goal-portal-bench-"),
+        RATE_LIMIT_RATE="100000",
+        RATE_LIMIT_BURST="100000",
+    )
+    if asgi:
+        command = ["uvicorn", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+                   "--log-level", "warning", "src.asgi:app"]
+    else:
+        command = ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+                   "--log-level", "warning", "src.wsgi:app"]
+    server = subprocess.Popen(command, env=env)
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(60):
+            try:
+                urllib.request.urlopen(f"{url}/api/health", timeout=1)
+                break
+            except Exception:
+                time.sleep(0.5)
+        command = f"python benchmark.py --url {url} --concurrency {concurrency} --requests {requests} --endpoints {endpoints}"
+        if json_out:
+            command += f" --json {json_out}"
+        c.run(command)
+    finally:
+        server.terminate()
+        server.wait()
+
+@task
+def startup_bench(c, runs=5, budget_ms=1000):
+    """Fail if importing the app takes longer than the budget or loads heavy modules eagerly"""
+    c.run(f"python startup_benchmark.py --runs {runs} --budget-ms {budget_ms}")
+
+@task
+def test(c):
+    """Run the unit tests in tests/ (test_auth.py and test_login.py need a running server)"""
+    c.run("python -m pytest -q tests")
+
+@task
+def migrate(c):
+    """Create the goals table and its full-text index if they are missing"""
+    from src.lib.db.goal_writer import create_goals_table
+    create_goals_table()
+    print("Goals table is ready")
@@ -0,0 +1,16 @@
+import pytest
+
+from src.lib.config import Config
+from src.lib.utils import local_store
+
+
+@pytest.fixture(autouse=True)
+def local_state(tmp_path, monkeypatch):
+    """Give each test its own LOCAL_STATE_DIR, so SQLite stores start empty."""
+    monkeypatch.setattr(Config, "LOCAL_STATE_DIR", str(tmp_path / "state"))
+    local_store._local.connections = {}
+    local_store._local.pid = None
+    yield tmp_path
+    for connection in local_store._local.connections.values():
+        connection.close()
+    local_store._local.connections = {}
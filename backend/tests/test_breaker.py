@@ -0,0 +1,97 @@
+import pytest
+
+from src.lib.utils import breaker as breaker_module
+from src.lib.utils.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(breaker_module, "time", clock)
+    return clock
+
+
+def make_breaker():
+    return CircuitBreaker(name="test", window=60, min_calls=4, failure_rate=0.5, slow_call_seconds=10, cooldown=30)
+
+
+def test_opens_once_enough_calls_fail(clock):
+    breaker = make_breaker()
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    # Two failures out of three calls, below min_calls
+    assert breaker.status()["state"] == CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.status()["state"] == OPEN
+    assert not breaker.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_success(11)
+    assert breaker.status()["state"] == OPEN
+
+
+def test_failures_outside_the_window_are_forgotten(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    clock.now += 61
+    breaker.record_failure(0.1)
+    assert breaker.status()["state"] == CLOSED
+
+
+def test_half_open_lets_one_probe_through_after_the_cooldown(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.status()["state"] == HALF_OPEN
+    # The probe is still running
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.status()["state"] == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_the_circuit_again(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.status()["state"] == OPEN
+    clock.now += 29
+    assert not breaker.allow()
+
+
+def test_a_probe_that_never_reports_back_is_replaced(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
@@ -0,0 +1,26 @@
+import io
+
+from openpyxl import load_workbook
+
+from src.lib.api.bulk import xlsx_chunks
+
+
+def read_rows(results):
+    workbook = load_workbook(io.BytesIO(b"".join(xlsx_chunks(results))), read_only=True)
+    return list(workbook.active.iter_rows(values_only=True))
+
+
+def test_xlsx_escapes_roster_values_and_goal_text():
+    header, goal_row, error_row = read_rows([
+        (2, {"name": '=HYPERLINK("http://example.com")', "jobTitle": "Engineer"},
+         [{"title": "=1+1", "kpi": "- Close 5 deals"}], None),
+        (3, {"name": "@SUM(A1)"}, None, "=error"),
+    ])
+    goal = dict(zip(header, goal_row))
+    assert goal["name"] == '\'=HYPERLINK("http://example.com")'
+    assert goal["jobTitle"] == "Engineer"
+    assert goal["title"] == "'=1+1"
+    assert goal["kpi"] == "- Close 5 deals"
+    failed = dict(zip(header, error_row))
+    assert failed["name"] == "'@SUM(A1)"
+    assert failed["error"] == "'=error"
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from src.lib.api.goal_parser import IncrementalGoalParser, GoalParseError, REQUIRED_GOAL_FIELDS, validate_goals
+
+
+def make_goal(title="Grow revenue"):
+    goal = {field: f"{field} value" for field in REQUIRED_GOAL_FIELDS}
+    goal["title"] = title
+    return goal
+
+
+GOALS = [make_goal("First {goal}"), make_goal('Second "quoted" goal')]
+GOALS_JSON = json.dumps(GOALS, indent=2)
+
+
+def test_parses_plain_array():
+    assert IncrementalGoalParser.parse(GOALS_JSON) == GOALS
+
+
+def test_parses_fenced_array():
+    assert IncrementalGoalParser.parse(f"```json\n{GOALS_JSON}\n```") == GOALS
+
+
+@pytest.mark.parametrize("preamble", [
+    'Here are the goals for the "Sales team:\n',
+    "Goals below { as requested:\n",
+    "Some [notes] first, and an odd } brace.\n",
+])
+def test_unbalanced_preamble_before_fence(preamble):
+    text = f"{preamble}```json\n{GOALS_JSON}\n```\nLet me know if you need changes {{"
+    assert IncrementalGoalParser.parse(text) == GOALS
+
+
+def test_unbalanced_preamble_without_fence():
+    text = f'Sure! Here is a "list:\n{GOALS_JSON}\nHope this helps {{'
+    assert IncrementalGoalParser.parse(text) == GOALS
+
+
+def test_streaming_returns_each_goal_when_it_closes():
+    text = f"Here you go \"\n```json\n{GOALS_JSON}\n```"
+    parser = IncrementalGoalParser()
+    goals = []
+    for start in range(0, len(text), 7):
+        goals.extend(parser.feed(text[start:start + 7]))
+    parser.close()
+    assert goals == GOALS
+
+
+def test_fence_split_across_chunks():
+    parser = IncrementalGoalParser()
+    goals = parser.feed('Note: "draft {\n`') + parser.feed("``js") + parser.feed(f"on\n{GOALS_JSON}\n``") + parser.feed("`")
+    parser.close()
+    assert goals == GOALS
+
+
+def test_trailing_commas_are_dropped():
+    text = '[{"title": "a", "kpi": "b",},]'
+    assert IncrementalGoalParser.parse(text, required_fields=("title", "kpi")) == [{"title": "a", "kpi": "b"}]
+
+
+def test_missing_fields():
+    goal = make_goal()
+    del goal["kpi"]
+    with pytest.raises(GoalParseError, match="Goal 1 is missing fields: kpi"):
+        IncrementalGoalParser.parse(json.dumps([goal]))
+
+
+def test_invalid_json():
+    with pytest.raises(GoalParseError, match="Goal 1 is not valid JSON"):
+        IncrementalGoalParser.parse('[{"title": "a" "kpi": "b"}]', required_fields=())
+
+
+def test_truncated_output():
+    with pytest.raises(GoalParseError, match="ended in the middle of a goal"):
+        IncrementalGoalParser.parse(GOALS_JSON[:-20])
+
+
+def test_no_goals():
+    with pytest.raises(GoalParseError, match="contained no goals"):
+        IncrementalGoalParser.parse("I could not come up with any goals {sorry}.")
+
+
+def test_object_opening():
+    text = 'Updated fields for "the goal:\n```json\n{"kpi": "Close 5 deals {monthly}"}\n```'
+    assert IncrementalGoalParser.parse(text, required_fields=(), opening="{") == [{"kpi": "Close 5 deals {monthly}"}]
+
+
+def test_object_opening_nested_lists():
+    entries = {"E1": GOALS, "E2": []}
+    text = f"Batch result:\n{json.dumps(entries)}\nDone [ok]"
+    assert IncrementalGoalParser.parse(text, required_fields=(), opening="{") == [entries]
+
+
+def test_validate_goals():
+    assert validate_goals(GOALS) == GOALS
+    with pytest.raises(GoalParseError, match="non-empty list"):
+        validate_goals([])
+    with pytest.raises(GoalParseError, match="Goal 2 is not an object"):
+        validate_goals([make_goal(), "goal"])
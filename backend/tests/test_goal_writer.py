@@ -0,0 +1,131 @@
+import os
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+
+from src.lib.db import goal_writer
+from src.lib.db.goal_writer import GoalWriteBuffer, PendingGoal
+
+
+class FakeDatabase:
+    """Stands in for GoalWriteBuffer._write: rejects any batch holding a bad row."""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = []
+        self.down = False
+
+    def write(self, batch):
+        self.batches.append([pending.row["title"] for pending in batch])
+        if self.down:
+            raise psycopg2.OperationalError("connection refused")
+        if any(pending.row["title"].startswith("bad") for pending in batch):
+            raise psycopg2.DataError("invalid byte sequence")
+        for pending in batch:
+            self.rows.append(pending.row["title"])
+            pending.resolve(len(self.rows))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    dead_letters = []
+    monkeypatch.setattr(GoalWriteBuffer, "_write", lambda self, batch: database.write(batch))
+    monkeypatch.setattr(goal_writer.audit_log, "record", dead_letters.append)
+    database.dead_letters = dead_letters
+    return database
+
+
+def make_buffer(max_attempts=2):
+    buffer = GoalWriteBuffer(flush_size=100, flush_interval=60, max_pending=100, max_attempts=max_attempts)
+    # Flushed by the tests, not by the background thread
+    buffer._started_pid = os.getpid()
+    return buffer
+
+
+def queue(buffer, *titles, durable=False):
+    return [buffer.add({"title": title}, durable=durable) for title in titles]
+
+
+def test_good_rows_are_written_around_a_bad_one(database):
+    buffer = make_buffer()
+    goals = queue(buffer, "a", "b", "bad", "c")
+    buffer.flush()
+    assert database.rows == ["a", "b", "c"]
+    assert [goal.id for goal in goals if goal.done] == [1, 2, 3]
+    # The bad row is kept for another attempt
+    assert buffer._pending == [goals[2]]
+    assert not goals[2].done
+
+
+def test_bad_row_is_dropped_after_max_attempts(database):
+    buffer = make_buffer(max_attempts=2)
+    bad, = queue(buffer, "bad")
+    buffer.flush()
+    buffer.flush()
+    assert buffer._pending == []
+    with pytest.raises(psycopg2.DataError):
+        bad.wait(0)
+    assert database.dead_letters[0]["row"] == {"title": "bad"}
+
+
+def test_durable_bad_row_fails_at_once(database):
+    buffer = make_buffer(max_attempts=5)
+    bad, = queue(buffer, "bad", durable=True)
+    buffer.flush()
+    with pytest.raises(psycopg2.DataError):
+        bad.wait(0)
+
+
+def test_unavailable_database_keeps_the_batch(database):
+    buffer = make_buffer()
+    database.down = True
+    kept = queue(buffer, "a", "b")
+    durable, = queue(buffer, "c", durable=True)
+    buffer.flush()
+    # Not split: the error says nothing about the rows
+    assert database.batches == [["a", "b", "c"]]
+    assert buffer._pending == kept
+    with pytest.raises(psycopg2.OperationalError):
+        durable.wait(0)
+
+    database.down = False
+    buffer.flush()
+    assert database.rows == ["a", "b"]
+
+
+def test_cancel_only_before_the_write_starts(database):
+    buffer = make_buffer()
+    goal, = queue(buffer, "a")
+    assert buffer.cancel(goal)
+    buffer.flush()
+    assert database.rows == []
+    written, = queue(buffer, "b")
+    buffer.flush()
+    assert not buffer.cancel(written)
+
+
+def test_pending_goal_wait_times_out():
+    with pytest.raises(TimeoutError):
+        PendingGoal({"title": "a"}).wait(0)
+
+
+def test_ids_are_matched_to_goals_by_row_contents(monkeypatch):
+    monkeypatch.setattr(goal_writer, "_table_created", True)
+
+    @contextmanager
+    def fake_cursor():
+        yield None
+
+    def fake_execute_values(cursor, sql, values, page_size, fetch):
+        assert sql.endswith(f"RETURNING id, {', '.join(goal_writer.GOAL_COLUMNS)}")
+        # Postgres does not promise RETURNING rows in VALUES order
+        return [(100 + index,) + row for index, row in reversed(list(enumerate(values)))]
+
+    monkeypatch.setattr(goal_writer, "db_cursor", fake_cursor)
+    monkeypatch.setattr(goal_writer, "execute_values", fake_execute_values)
+    batch = [PendingGoal({"title": title, "manager_id": 7}) for title in ("a", "b", "a")]
+    GoalWriteBuffer()._write(batch)
+    assert batch[1].id == 101
+    assert sorted([batch[0].id, batch[2].id]) == [100, 102]
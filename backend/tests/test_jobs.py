@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from src.lib.config import Config
+from src.lib.utils.jobs import JobQueue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def fail(payload):
+    raise RuntimeError(f"cannot handle {payload['n']}")
+
+
+def test_jobs_run_in_the_background():
+    queue = JobQueue({"double": lambda payload: payload["n"] * 2, "fail": fail}, workers=1, poll_interval=0.05)
+    succeeded = wait_for(queue, queue.submit("double", {"n": 21}))
+    assert succeeded["status"] == "succeeded"
+    assert succeeded["result"] == 42
+    failed = wait_for(queue, queue.submit("fail", {"n": 1}))
+    assert failed["status"] == "failed"
+    assert failed["error"] == "cannot handle 1"
+
+
+def test_unknown_kind_is_refused():
+    queue = JobQueue({}, workers=0)
+    with pytest.raises(ValueError):
+        queue.submit("missing", {})
+    assert queue.get("no-such-job") is None
+
+
+def test_jobs_are_claimed_once_in_order():
+    queue = JobQueue({"noop": lambda payload: None}, workers=0)
+    first = queue.submit("noop", {})
+    second = queue.submit("noop", {})
+    assert queue._claim()[0] == first
+    assert queue._claim()[0] == second
+    assert queue._claim() is None
+    assert queue.get(first)["status"] == "running"
+
+
+def test_stale_running_jobs_are_requeued(monkeypatch):
+    queue = JobQueue({"noop": lambda payload: None}, workers=0)
+    job_id = queue.submit("noop", {})
+    assert queue._claim()[0] == job_id
+    # The worker that claimed it died; once it is stale another worker takes it over
+    monkeypatch.setattr(Config, "JOB_STALE_SECONDS", -1)
+    assert queue._claim()[0] == job_id
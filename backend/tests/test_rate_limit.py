@@ -0,0 +1,71 @@
+import pytest
+
+from src.lib.utils import rate_limit as rate_limit_module
+from src.lib.utils.rate_limit import RateLimiter, RateLimitExceeded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit_module, "time", clock)
+    return clock
+
+
+def test_burst_is_served_at_once_then_calls_queue(clock):
+    limiter = RateLimiter(name="test", rate=1, burst=3, max_wait=2)
+    assert [limiter.reserve("client") for _ in range(3)] == [0, 0, 0]
+    # Out of tokens: the next two calls reserve the tokens of the next seconds
+    assert limiter.reserve("client") == pytest.approx(1)
+    assert limiter.reserve("client") == pytest.approx(2)
+
+
+def test_rejection_does_not_take_tokens(clock):
+    limiter = RateLimiter(name="test", rate=1, burst=1, max_wait=0)
+    assert limiter.reserve("client") == 0
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.reserve("client")
+    assert error.value.retry_after == pytest.approx(1)
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve("client")
+    # The rejected calls left the bucket as it was, so one second refills it
+    clock.now += 1
+    assert limiter.reserve("client") == 0
+
+
+def test_tokens_refill_up_to_the_burst(clock):
+    limiter = RateLimiter(name="test", rate=2, burst=4, max_wait=0)
+    for _ in range(4):
+        limiter.reserve("client")
+    clock.now += 100
+    assert [limiter.reserve("client") for _ in range(4)] == [0, 0, 0, 0]
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve("client")
+
+
+def test_cost_and_clients_are_separate(clock):
+    limiter = RateLimiter(name="test", rate=1, burst=5, max_wait=10)
+    assert limiter.reserve("bulk", cost=5) == 0
+    assert limiter.reserve("bulk", cost=3) == pytest.approx(3)
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve("bulk", cost=8)
+    assert limiter.reserve("other") == 0
+
+
+def test_acquire_sleeps_for_the_reserved_wait(clock):
+    limiter = RateLimiter(name="test", rate=0.5, burst=1, max_wait=5)
+    limiter.acquire("client")
+    limiter.acquire("client")
+    assert clock.slept == pytest.approx(2)
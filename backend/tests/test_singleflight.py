@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.lib.api.llm import StubChatModel
+from src.lib.api.smart_goals import SMARTGoalsGenerator
+from src.lib.utils.audit import AuditLog
+from src.lib.utils.breaker import CircuitBreaker
+from src.lib.utils.cache import ResultCache
+from src.lib.utils.singleflight import SingleFlight, SingleFlightError
+
+
+def make_flight(cache, **kwargs):
+    # Two instances stand in for two gunicorn workers sharing the lease store
+    return SingleFlight(cache.get, poll_interval=0.02, **kwargs)
+
+
+def run_in_thread(fn):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = fn()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_follower_in_another_worker_takes_the_cached_result():
+    cache = ResultCache()
+    leader, follower = make_flight(cache), make_flight(cache)
+    started = threading.Event()
+    calls = []
+
+    def work():
+        calls.append("leader")
+        started.set()
+        time.sleep(0.2)
+        cache.set("key", ["goal"])
+        return ["goal"]
+
+    thread, outcome = run_in_thread(lambda: leader.do("key", work))
+    started.wait()
+    assert follower.do("key", lambda: calls.append("follower")) == ["goal"]
+    thread.join()
+    assert outcome["result"] == ["goal"]
+    assert calls == ["leader"]
+
+
+def test_waiting_worker_gets_the_leaders_error():
+    cache = ResultCache()
+    leader, follower = make_flight(cache), make_flight(cache)
+    started = threading.Event()
+    calls = []
+
+    def fail():
+        calls.append("leader")
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("LLM unavailable")
+
+    thread, outcome = run_in_thread(lambda: leader.do("key", fail))
+    started.wait()
+    with pytest.raises(SingleFlightError, match="LLM unavailable"):
+        follower.do("key", lambda: calls.append("follower"))
+    thread.join()
+    assert isinstance(outcome["error"], RuntimeError)
+    assert calls == ["leader"]
+
+
+def test_failure_is_not_served_to_a_later_call():
+    cache = ResultCache()
+    first, second = make_flight(cache), make_flight(cache)
+
+    def fail():
+        raise RuntimeError("LLM unavailable")
+
+    with pytest.raises(RuntimeError):
+        first.do("key", fail)
+    # Within the error's grace period, but this call was not waiting on the failed lease
+    assert second.do("key", lambda: "fresh") == "fresh"
+
+
+def test_uncached_result_is_not_shared_across_workers():
+    cache = ResultCache()
+    leader, follower = make_flight(cache), make_flight(cache)
+    started = threading.Event()
+
+    def fallback():
+        started.set()
+        time.sleep(0.2)
+        return "fallback"
+
+    thread, outcome = run_in_thread(lambda: leader.do("key", fallback))
+    started.wait()
+    assert follower.do("key", lambda: "own result") == "own result"
+    thread.join()
+    assert outcome["result"] == "fallback"
+
+
+def test_expired_lease_is_taken_over():
+    cache = ResultCache()
+    crashed, follower = make_flight(cache, lease_seconds=0.1), make_flight(cache, lease_seconds=0.1)
+    assert crashed._acquire("key", "crashed-worker") is None
+    assert follower.do("key", lambda: "recovered") == "recovered"
+
+
+def test_async_waiting_worker_gets_the_leaders_error():
+    cache = ResultCache()
+    leader, follower = make_flight(cache), make_flight(cache)
+
+    async def fail():
+        await asyncio.sleep(0.2)
+        raise RuntimeError("LLM unavailable")
+
+    async def follow():
+        await asyncio.sleep(0.05)
+        return await follower.ado("key", lambda: asyncio.sleep(0, "follower"))
+
+    async def main():
+        return await asyncio.gather(leader.ado("key", fail), follow(), return_exceptions=True)
+
+    leader_outcome, follower_outcome = asyncio.run(main())
+    assert isinstance(leader_outcome, RuntimeError)
+    assert isinstance(follower_outcome, SingleFlightError)
+
+
+def test_generation_after_a_failure_calls_the_llm_again(tmp_path):
+    llm = StubChatModel(latency=0, failure_rate=1.0)
+    generator = SMARTGoalsGenerator(llm=llm, cache=ResultCache(), breaker=CircuitBreaker(min_calls=100),
+                                    audit=AuditLog(path=str(tmp_path / "audit.jsonl")))
+    inputs = dict(job_title="Engineer", department="Engineering", goal_description="Improve reliability",
+                  key_results="Fewer incidents", deadline="2026-12-31", managers_goal="Ship on time")
+
+    fallback = generator.generate_smart_goals(**inputs, max_retries=1)
+    failed_calls = llm._calls
+    assert failed_calls >= 1
+
+    llm.failure_rate = 0.0
+    goals = generator.generate_smart_goals(**inputs, max_retries=1)
+    assert llm._calls == failed_calls + 1
+    assert goals != fallback
@@ -0,0 +1,49 @@
+import json
+
+from src.lib.api.smart_goals import SMARTGoalsGenerator
+from src.lib.api.llm import StubChatModel
+from src.lib.utils.prompts import PromptSnapshot
+
+PROMPTS = {
+    "core_values": ["Simplify to Amplify: Remove complexity", "Own It: Act like an owner"],
+    "framework_3e": ["ELEVATE: Focus on Growth & Scale", "EXTEND: Product Penetration & Customer Base"],
+    "company_top_bets": ["INVESTING FOR SCALE: Scalable infrastructure and processes",
+                         "TRANSFORMING INTO AN AI COMPANY: AI-enabled organization"],
+}
+
+GOAL = {
+    "title": "Automate goal drafting",
+    "description": "Build a script that drafts goals.",
+    "kpi": "50% less time spent drafting goals",
+    "companyTopBetAlignment": "TRANSFORMING INTO AN AI COMPANY",
+    "framework3E": "ELEVATE - grow the team's output",
+    "coreValue": "Simplify to Amplify: Remove complexity",
+}
+
+
+def parse_update(diff):
+    generator = SMARTGoalsGenerator(llm=StubChatModel(latency=0))
+    return generator._parse_update(PromptSnapshot(PROMPTS), GOAL, json.dumps(diff))
+
+
+def test_reference_ids_naming_the_same_entry_are_not_changes():
+    assert parse_update({"companyTopBetAlignment": "TB2", "framework3E": "E1", "coreValue": "cv1"}) == {}
+
+
+def test_reference_ids_naming_another_entry_are_expanded():
+    assert parse_update({"framework3E": "E2", "coreValue": "CV1"}) == {
+        "framework3E": "EXTEND: Product Penetration & Customer Base"
+    }
+
+
+def test_text_differing_only_in_case_or_spacing_is_not_a_change():
+    changes = parse_update({"title": "automate  goal drafting ", "kpi": "30% less time spent drafting goals"})
+    assert changes == {"kpi": "30% less time spent drafting goals"}
+
+
+def test_reference_id():
+    snapshot = PromptSnapshot(PROMPTS)
+    assert snapshot.reference_id("E2", "E") == "E2"
+    assert snapshot.reference_id("extend: product penetration & customer base", "E") == "E2"
+    assert snapshot.reference_id("ELEVATED growth", "E") is None
+    assert snapshot.reference_id("TB1", "E") is None
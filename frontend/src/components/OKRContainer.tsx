@@ -4,8 +4,9 @@ import type React from "react"
 import { useState } from "react"
 import OKRForm from "./OKRForm"
 import LoadingSpinner from "./ui/LoadingSpinner"
-import { generateSmartGoal, retry } from "@/lib/api"
-import type { OKRData, OKRContainerProps, AIResultProps } from "@/types/index"
+import toast from "react-hot-toast"
+import { generateSmartGoal, streamSmartGoals, retry } from "@/lib/api"
+import type { OKRData, OKRContainerProps, AIResultProps, OutputGoalProps } from "@/types/index"
 
 // ['title', 'description', 'kpi', 'companyTopBetAlignment', 'framework3E', 'coreValue']
 
@@ -22,6 +23,33 @@ const OKRContainer: React.FC<OKRContainerProps> = ({ onSubmit, user }) => {
     setError(null)
 
     try {
+      // Each goal is shown as soon as the backend has generated it
+      const goals: OutputGoalProps[] = []
+      const streamed = await streamSmartGoals(data, (goal, index) => {
+        goals[index] = goal
+        onSubmit(data, { goals: [...goals] })
+      }).catch((err) => {
+        console.error("Goal stream unavailable, falling back:", err)
+        return null
+      })
+
+      if (streamed?.success) {
+        setResult({ goals })
+        setRetryCount(0)
+        onSubmit(data, { goals: [...goals] }, streamed.result?.method === "fallback")
+        return
+      }
+      if (streamed && goals.length > 0) {
+        // Keep the goals that already arrived instead of starting over
+        toast.error(streamed.error || "Goal generation stopped early")
+        return
+      }
+      if (streamed) {
+        setError(streamed.error || "Failed to generate SMART goal")
+        return
+      }
+
+      // The stream could not be opened: use the non-streaming endpoint, which also covers an unreachable server
       const response = await retry(() => generateSmartGoal(data))
 
       if (response.success) {
@@ -8,7 +8,10 @@ import { Textarea } from "@/components/ui/textarea"
 import { Label } from "@/components/ui/label"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Calendar, Target, Users, FileText, CheckCircle, Building2, Briefcase } from "lucide-react"
-import type { OKRData, OKRFormProps } from "@/types/index"
+import type { OKRData, OKRFormProps, OutputGoalProps } from "@/types/index"
+import { findSimilarGoals } from "@/lib/api"
+
+const SIMILAR_GOALS_DEBOUNCE_MS = 600
 
 const OKRForm: React.FC<OKRFormProps> = ({ onSubmit, isLoading = false, user }) => {
   // console.log('OKRForm user:', user);
@@ -22,6 +25,34 @@ const OKRForm: React.FC<OKRFormProps> = ({ onSubmit, isLoading = false, user })
     dueDate: "",
   })
 
+  const [similarGoals, setSimilarGoals] = useState<OutputGoalProps[]>([])
+
+  // Suggest saved goals similar to the draft, so one can be reused instead of generating a new one
+  useEffect(() => {
+    const query = formData.goalDescription.trim()
+    if (!query) {
+      setSimilarGoals([])
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      const response = await findSimilarGoals(query, formData.department || undefined, 3)
+      if (!cancelled) setSimilarGoals(response.goals)
+    }, SIMILAR_GOALS_DEBOUNCE_MS)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [formData.goalDescription, formData.department])
+
+  const handleUseSimilarGoal = (goal: OutputGoalProps) => {
+    setFormData((prevData) => ({
+      ...prevData,
+      goalDescription: goal.description,
+      keyResult: goal.kpi,
+    }))
+  }
+
   // Update form data when user prop changes
   useEffect(() => {
     if (user) {
@@ -138,6 +169,22 @@ const OKRForm: React.FC<OKRFormProps> = ({ onSubmit, isLoading = false, user })
               rows={4}
               className="border-slate-300 focus:border-teal-500 focus:ring-teal-500 resize-none"
             />
+            {similarGoals.length > 0 && (
+              <div className="rounded-lg border border-teal-100 bg-teal-50/50 p-3 space-y-2">
+                <p className="text-sm font-medium text-slate-600">Similar goals already saved</p>
+                {similarGoals.map((goal, index) => (
+                  <div key={index} className="flex items-start justify-between gap-3">
+                    <div>
+                      <p className="text-sm font-semibold text-slate-800">{goal.title}</p>
+                      <p className="text-xs text-slate-600 line-clamp-2">{goal.description}</p>
+                    </div>
+                    <Button type="button" variant="outline" size="sm" onClick={() => handleUseSimilarGoal(goal)}>
+                      Use
+                    </Button>
+                  </div>
+                ))}
+              </div>
+            )}
           </div>
 
           <div className="space-y-2">
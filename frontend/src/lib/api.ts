@@ -4,6 +4,7 @@ import { OKRData } from '@/types';
 import toast from 'react-hot-toast';
 import { OutputGoalProps } from '@/types/index';
 import { API_BASE_URL } from '@/config';
+import { getAuthHeaders } from './auth';
 
 const SMART_GOAL_TIMEOUT_MS = 180000;
 
@@ -23,6 +24,8 @@ export const generateSmartGoal = async (data: OKRData, retryCount = 2) => {try {
       keyResult: data.keyResult,
       managersGoal: data.managersGoal
     }, {
+      // The token lets the backend rate limit per user rather than per IP
+      headers: getAuthHeaders(),
       // LLM generation can take over a minute in some cases.
       timeout: SMART_GOAL_TIMEOUT_MS
     });
@@ -65,6 +68,70 @@ export const generateSmartGoal = async (data: OKRData, retryCount = 2) => {try {
 };
 
 
+export interface GoalStreamResult {
+  success: boolean;
+  result?: { goals_count: number; method: string; timestamp: string };
+  error?: string;
+}
+
+/**
+ * Streams AI-generated SMART goals from the backend as Server-Sent Events
+ * @param data User's OKR form data
+ * @param onGoal Called with each goal as soon as the backend has finished generating it
+ * @returns Promise resolving to the final "done" payload of the stream; rejects if the server is unreachable
+ */
+export const streamSmartGoals = async (
+  data: OKRData,
+  onGoal: (goal: OutputGoalProps, index: number) => void
+): Promise<GoalStreamResult> => {
+  const response = await fetch(`${API_BASE_URL}/api/generate-smart-goals/stream`, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({
+      goalDescription: data.goalDescription,
+      dueDate: data.dueDate,
+      department: data.department,
+      jobTitle: data.jobTitle,
+      startDate: data.startDate,
+      keyResult: data.keyResult,
+      managersGoal: data.managersGoal
+    })
+  });
+
+  if (!response.ok || !response.body) {
+    const body = await response.json().catch(() => ({}));
+    return { success: false, error: body.error || 'An error occurred while connecting to the server' };
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+      const payload = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || '{}');
+      if (event === 'goal') {
+        onGoal(payload.goal, payload.index);
+      } else if (event === 'error') {
+        return { success: false, error: payload.error };
+      } else if (event === 'done') {
+        return { success: true, result: payload };
+      }
+    }
+  }
+  return { success: false, error: 'Goal stream ended unexpectedly' };
+};
+
+
 /**
  * Sends users goal to backend for saving it
  * @param goal User's goal data
@@ -72,7 +139,10 @@ export const generateSmartGoal = async (data: OKRData, retryCount = 2) => {try {
  */
 export const saveUserGoal = async (goal: OutputGoalProps) => {
   try {
-    const response = await axios.post(`${API_BASE_URL}/api/save-user-goal`, goal);
+    // The goal is saved for the logged in user, so the token is required
+    const response = await axios.post(`${API_BASE_URL}/api/save-user-goal`, goal, {
+      headers: getAuthHeaders()
+    });
     return {
       success: true,
       result: response.data
@@ -95,6 +165,8 @@ export const SendEdit = async (goal: OutputGoalProps, comment: string) => {
     const response = await axios.post(`${API_BASE_URL}/api/edit-user-goal`, {
       goal,
       comment
+    }, {
+      headers: getAuthHeaders()
     });
 
     return {
@@ -111,6 +183,34 @@ export const SendEdit = async (goal: OutputGoalProps, comment: string) => {
   }
 };
 
+/**
+ * Finds saved goals similar to a draft goal description, so an existing goal
+ * can be reused instead of generating a new one
+ * @param query Draft goal description
+ * @param department Optional department whose goals are ranked first
+ * @param limit Maximum number of goals to return
+ * @returns Promise containing the matching goals, best match first
+ */
+export const findSimilarGoals = async (query: string, department?: string, limit = 5) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/api/goals/similar`, {
+      params: { q: query, department, limit },
+      headers: getAuthHeaders()
+    });
+    return {
+      success: true,
+      goals: response.data.goals as OutputGoalProps[]
+    };
+  } catch (error: any) {
+    console.error('Error searching similar goals:', error);
+    return {
+      success: false,
+      goals: [] as OutputGoalProps[],
+      error: error.response?.data?.error || 'An error occurred while connecting to the server'
+    };
+  }
+};
+
 /**
  * Retry the API call if it fails
  * @param fn Function to retry
@@ -3,6 +3,8 @@
  */
 import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
+import { API_BASE_URL } from '@/config';
+import { getAuthToken } from './auth';
 
 interface OKRData {
   department: string;
@@ -85,3 +87,41 @@ export const exportToPdf = async (elementId: string) => {
     alert('Failed to generate PDF. Please try again.');
   }
 };
+
+export interface GoalExportFilters {
+  department?: string;
+  manager?: string;
+  cycle?: string;
+}
+
+/**
+ * Download saved goals for the whole organisation as CSV or XLSX,
+ * generated and streamed by the backend
+ * @param filters Optional department, manager ID and cycle to export
+ * @param format 'csv' (default) or 'xlsx'
+ */
+export const downloadGoalsExport = async (filters: GoalExportFilters = {}, format: 'csv' | 'xlsx' = 'csv') => {
+  const params = new URLSearchParams({ format });
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) params.set(key, value);
+  });
+
+  const token = getAuthToken();
+  const response = await fetch(`${API_BASE_URL}/api/goals/export?${params}`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {}
+  });
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw new Error(body.error || 'Failed to export goals');
+  }
+
+  const blob = await response.blob();
+  const fileName = response.headers.get('Content-Disposition')?.match(/filename=([^;]+)/)?.[1]
+    || `goals-${new Date().toISOString().split('T')[0]}.${format}`;
+  const url = URL.createObjectURL(blob);
+  const linkElement = document.createElement('a');
+  linkElement.setAttribute('href', url);
+  linkElement.setAttribute('download', fileName);
+  linkElement.click();
+  URL.revokeObjectURL(url);
+};
@@ -6,6 +6,7 @@ import Login from '@/components/Login';
 import toast, { Toaster } from 'react-hot-toast';
 import {OKRData} from '@/types/index'; // Assuming you have a types file for OKRData
 import { UserProp } from '@/types/user';
+import { downloadGoalsExport } from '@/lib/export';
 
 const Index = () => {
   const [isLoggedIn, setIsLoggedIn] = useState(false);
@@ -34,6 +35,12 @@ const Index = () => {
       setAiResult(result);
       setIsFallbackData(!!isFallback);
     }
+  };  const handleExportGoals = async () => {
+    try {
+      await downloadGoalsExport({}, 'csv');
+    } catch (error: any) {
+      toast.error(error.message || 'Failed to export goals');
+    }
   };  const handleNewOKR = () => {
     setSubmittedOKR(null);
     setAiResult(null);
@@ -64,7 +71,16 @@ const Index = () => {
               </h2>
               <p className="text-slate-600 max-w-2xl mx-auto">                Create measurable goals aligned with business objectives. Our system will generate
                 SMART goals (Specific, Measurable, Achievable, Relevant, Time-bound) and KPIs to help you achieve success.
-              </p>            </div>
+              </p>
+              {/* The org-wide export is only open to HR and admins */}
+              {(currentUser?.role === 'hr' || currentUser?.role === 'admin') && (
+                <button
+                  onClick={handleExportGoals}
+                  className="mt-4 text-teal-600 hover:text-teal-800 font-semibold underline transition-colors"
+                >
+                  Export All Saved Goals (CSV)
+                </button>
+              )}            </div>
             <OKRContainer onSubmit={handleOKRSubmit} user={currentUser} />
           </div>
         ) : (
@@ -4,6 +4,7 @@ export interface UserProp {
   department?: string;
   designation?: string;
   managers_goal?: string;
+  role?: string;
 }
 
 